@@ -0,0 +1,78 @@
+"""
+Cached instructor authorization.
+
+Instructor endpoints need the caller's Instructor_id and whether they teach
+the course they act on. Both change rarely: Teaches rows are only written
+by course creation and deletion and add_instructor_to_course, instructors
+only by registration and user deletion. Each worker caches
+email -> (instructor_id, taught course ids) for AUTHZ_CACHE_TTL seconds so
+the check is a dictionary lookup on the hot path.
+
+The admin endpoints behind those writes invalidate the cache of their own
+worker as soon as their transaction commits (app.database.after_commit);
+dropping it earlier would let a concurrent lookup cache the old rows. Every worker also drops its cache when it applies the
+catalog notification sent by the same write (see app/catalog.py), and the
+TTL bounds staleness should one be missed.
+"""
+import os
+import time
+from typing import FrozenSet, NamedTuple
+from app.catalog import add_change_listener
+from app.database import execute_prepared
+
+AUTHZ_CACHE_TTL = float(os.getenv("AUTHZ_CACHE_TTL", "60"))  # seconds
+
+class InstructorAccess(NamedTuple):
+    instructor_id: int
+    course_ids: FrozenSet[int]
+    expires: float
+
+# Unknown emails are not cached, so entries are bounded by the instructor count
+_cache = {}
+# Bumped by every invalidation; a lookup that raced one does not store its result
+_generation = 0
+_stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+async def instructor_access(cursor, email):
+    """InstructorAccess for email, or None if no such instructor"""
+    now = time.monotonic()
+    entry = _cache.get(email)
+    if entry is not None and entry.expires > now:
+        _stats["hits"] += 1
+        return entry
+
+    _stats["misses"] += 1
+    generation = _generation
+    await execute_prepared(cursor, "instructor_courses", (email,))
+    row = await cursor.fetchone()
+    if row is None:
+        _cache.pop(email, None)
+        return None
+    entry = InstructorAccess(row[0], frozenset(row[1]), now + AUTHZ_CACHE_TTL)
+    if generation == _generation:
+        _cache[email] = entry
+    return entry
+
+def invalidate(email=None, instructor_id=None):
+    """Forget one instructor, by email or by id"""
+    global _generation
+    _generation += 1
+    _stats["invalidations"] += 1
+    if email is not None:
+        _cache.pop(email, None)
+    if instructor_id is not None:
+        for cached_email, entry in list(_cache.items()):
+            if entry.instructor_id == instructor_id:
+                del _cache[cached_email]
+
+def invalidate_all():
+    global _generation
+    _generation += 1
+    _stats["invalidations"] += 1
+    _cache.clear()
+
+def get_authz_stats():
+    return {"cached": len(_cache), **_stats}
+
+# Any course change may add or remove Teaches rows
+add_change_listener(lambda course_ids: invalidate_all())
@@ -0,0 +1,382 @@
+"""
+In-process snapshot of the course catalog.
+
+Course, University, Book, Topic, Teaches and Course_Prerequisites change
+rarely and only through the admin and instructor routers, but are read on
+nearly every student page. Each worker keeps them in memory and serves
+course search from the snapshot without a database round trip.
+
+Write endpoints call notify_changed() inside their transaction. Postgres
+delivers the NOTIFY on commit to every worker's listener (including the
+writer's own), which reloads just the affected courses. A periodic full
+refresh and a reload after every listener reconnect bound how stale a
+worker can get if a notification is ever missed.
+"""
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+from typing import NamedTuple, Optional, Tuple
+from decimal import Decimal
+import psycopg
+from app.database import get_db_cursor, get_conninfo
+from app.models import CourseResponse
+
+logger = logging.getLogger(__name__)
+
+CATALOG_CHANNEL = "catalog_changed"
+CATALOG_REFRESH_INTERVAL = float(os.getenv("CATALOG_REFRESH_INTERVAL", "300"))  # seconds between full reloads
+CATALOG_LISTEN_RETRY = 5  # seconds before reconnecting a dropped listener
+
+class CatalogCourse(NamedTuple):
+    course_id: int
+    name: str
+    name_lower: str
+    price: Decimal
+    duration: int
+    course_type: Optional[str]
+    difficulty_level: Optional[str]
+    notes_url: Optional[str]
+    video_url: Optional[str]
+    book_id: int
+    uni_id: int
+    topic_ids: Tuple[int, ...]
+    instructor_ids: Tuple[int, ...]
+    prerequisite_ids: Tuple[int, ...]
+
+COURSE_QUERY = """
+    SELECT c.Course_id, c.Name, c.Price, c.Duration, c.Course_Type,
+           c.Difficulty_level, c.Notes_URL, c.Video_URL, c.Book_id, c.Uni_id,
+           ARRAY(SELECT Topic_id FROM Course_Topic WHERE Course_id = c.Course_id),
+           ARRAY(SELECT Instructor_id FROM Teaches WHERE Course_id = c.Course_id),
+           ARRAY(SELECT Prerequisite_Course_id FROM Course_Prerequisites WHERE Course_id = c.Course_id)
+    FROM Course c
+"""
+
+# Course order is taken from the database so it follows the column
+# collation exactly as ORDER BY c.Name does on the SQL search path
+ORDER_QUERY = """
+    SELECT Course_id, ROW_NUMBER() OVER (ORDER BY Name, Course_id) - 1
+    FROM Course
+"""
+
+# (table, id column) for each name lookup the snapshot keeps
+NAME_TABLES = {
+    "universities": ("University", "Uni_id"),
+    "books": ("Book", "Book_id"),
+    "topics": ("Topic", "Topic_id"),
+    "instructors": ("Instructor", "Instructor_id"),
+}
+
+def _intern(value):
+    # Course_Type and Difficulty_level are nullable
+    return sys.intern(value) if value is not None else None
+
+def _course_from_row(row):
+    return CatalogCourse(
+        course_id=row[0],
+        name=row[1],
+        name_lower=row[1].lower(),
+        price=row[2],
+        duration=row[3],
+        course_type=_intern(row[4]),
+        difficulty_level=_intern(row[5]),
+        notes_url=row[6],
+        video_url=row[7],
+        book_id=row[8],
+        uni_id=row[9],
+        topic_ids=tuple(row[10]),
+        instructor_ids=tuple(row[11]),
+        prerequisite_ids=tuple(row[12]),
+    )
+
+def _courses_from_rows(rows):
+    """Snapshot entries for rows, skipping (and logging) any that cannot be loaded"""
+    courses = []
+    for row in rows:
+        try:
+            courses.append(_course_from_row(row))
+        except Exception as e:
+            logger.warning("Skipping course %s in catalog snapshot: %s", row[0], e)
+    return courses
+
+class PrerequisiteIndex:
+    """Direct prerequisites of every course, as bitsets, plus their inverse.
+
+    Each course owns one bit; required[course_id] has the bits of the
+    courses it lists in Course_Prerequisites. That is the rule the enroll
+    statement applies, so a course is eligible exactly when enrolling
+    would succeed. dependents[p] holds the courses that require p: finding
+    what a student can take only visits courses without prerequisites and
+    those unlocked by something they completed, never the whole catalog.
+    """
+
+    def __init__(self, courses):
+        self.bit = {course_id: 1 << i for i, course_id in enumerate(sorted(courses))}
+        self.required = {}
+        self.dependents = {}
+        unrestricted = set()
+        for course in courses.values():
+            prereq_ids = [p for p in course.prerequisite_ids if p in courses]
+            self.required[course.course_id] = self.mask(prereq_ids)
+            if not prereq_ids:
+                unrestricted.add(course.course_id)
+            for prereq_id in prereq_ids:
+                self.dependents.setdefault(prereq_id, set()).add(course.course_id)
+        self.unrestricted = frozenset(unrestricted)
+
+    def mask(self, course_ids):
+        """Bitset of the given courses; unknown ids are ignored"""
+        mask = 0
+        for course_id in course_ids:
+            mask |= self.bit.get(course_id, 0)
+        return mask
+
+    def eligible(self, completed, excluded=()):
+        """Ids of courses, not in excluded, whose prerequisites are all in completed"""
+        done = self.mask(completed)
+        unlocked = set().union(*(self.dependents.get(c, ()) for c in completed))
+        unlocked = {c for c in unlocked if not self.required[c] & ~done}
+        return (self.unrestricted | unlocked).difference(excluded)
+
+class Catalog:
+    """Courses plus the names they reference, in the database's name order"""
+
+    def __init__(self):
+        self.courses = {}
+        self.order = []  # course ids sorted by (name, course_id) under the database collation
+        self.position = {}  # course_id -> index in order
+        self.names = {kind: {} for kind in NAME_TABLES}
+        self.version = 0
+        self.loaded_at = None
+        self._prerequisites = None  # PrerequisiteIndex, rebuilt after any change
+
+    @property
+    def prerequisites(self):
+        if self._prerequisites is None:
+            self._prerequisites = PrerequisiteIndex(self.courses)
+        return self._prerequisites
+
+    def _put(self, course):
+        self._prerequisites = None
+        self.courses[course.course_id] = course
+
+    def _remove(self, course_id):
+        self._prerequisites = None
+        if self.courses.pop(course_id, None) is None:
+            return
+        # FK cascades drop the course from other courses' prerequisites
+        for other in list(self.courses.values()):
+            if course_id in other.prerequisite_ids:
+                self.courses[other.course_id] = other._replace(
+                    prerequisite_ids=tuple(p for p in other.prerequisite_ids if p != course_id)
+                )
+
+    def name(self, kind, entity_id):
+        return self.names[kind].get(entity_id, "")
+
+    def to_response(self, course):
+        """CourseResponse with names resolved, lists sorted like the SQL search"""
+        return CourseResponse(
+            course_id=course.course_id,
+            course_name=course.name,
+            price=course.price,
+            duration=course.duration,
+            course_type=course.course_type,
+            difficulty_level=course.difficulty_level,
+            notes_url=course.notes_url,
+            video_url=course.video_url,
+            university_name=self.name("universities", course.uni_id),
+            book_name=self.name("books", course.book_id),
+            instructors=sorted(self.name("instructors", i) for i in course.instructor_ids),
+            topics=sorted(self.name("topics", t) for t in course.topic_ids),
+            prerequisites=sorted(
+                self.courses[p].name for p in course.prerequisite_ids if p in self.courses
+            ),
+        )
+
+    def _set_order(self, rows):
+        """Order from (course_id, row number) rows of ORDER_QUERY"""
+        ranked = sorted((n, course_id) for course_id, n in rows if course_id in self.courses)
+        self.order = [course_id for _, course_id in ranked]
+        self.position = {course_id: i for i, course_id in enumerate(self.order)}
+
+    def start_index(self, after):
+        """Position just past the (name, course_id) key after, or 0.
+
+        None when the key's course has since been renamed or deleted, so
+        the snapshot alone cannot place it.
+        """
+        if after is None:
+            return 0
+        name, course_id = after
+        course = self.courses.get(course_id)
+        if course is None or course.name != name or course_id not in self.position:
+            return None
+        return self.position[course_id] + 1
+
+_catalog = Catalog()
+_load_lock = asyncio.Lock()
+# Callbacks run with the changed course ids (None after a full reload)
+# whenever this worker applies a change, e.g. to drop dependent caches
+_change_listeners = []
+_listener_task = None
+_refresh_task = None
+
+def get_catalog():
+    return _catalog
+
+def add_change_listener(callback):
+    _change_listeners.append(callback)
+
+def _changed(course_ids):
+    for callback in _change_listeners:
+        callback(course_ids)
+
+async def _fetch_names(cursor, kind, ids=None):
+    table, id_column = NAME_TABLES[kind]
+    query = f"SELECT {id_column}, Name FROM {table}"
+    if ids is None:
+        await cursor.execute(query)
+    else:
+        await cursor.execute(f"{query} WHERE {id_column} = ANY(%s)", (list(ids),))
+    return {row[0]: row[1] for row in await cursor.fetchall()}
+
+async def load_catalog():
+    """Replace the snapshot with a full reload.
+
+    Reads the primary in autocommit: a replica could still be behind the
+    commit whose notification triggered the reload.
+    """
+    async with _load_lock:
+        catalog = Catalog()
+        async with get_db_cursor(autocommit=True) as cursor:
+            await cursor.execute(COURSE_QUERY)
+            rows = await cursor.fetchall()
+            await cursor.execute(ORDER_QUERY)
+            order = await cursor.fetchall()
+            for kind in NAME_TABLES:
+                catalog.names[kind] = await _fetch_names(cursor, kind)
+
+        for course in _courses_from_rows(rows):
+            catalog.courses[course.course_id] = course
+        catalog._set_order(order)
+        catalog.version = _catalog.version + 1
+        catalog.loaded_at = time.time()
+        _swap(catalog)
+        _changed(None)
+    print(f"Course catalog loaded: {len(catalog.courses)} courses")
+
+def _swap(catalog):
+    global _catalog
+    _catalog = catalog
+
+async def reload_courses(course_ids):
+    """Patch the snapshot with the current rows for course_ids"""
+    if _catalog.loaded_at is None:
+        return await load_catalog()
+    async with _load_lock:
+        async with get_db_cursor(autocommit=True) as cursor:
+            await cursor.execute(COURSE_QUERY + " WHERE c.Course_id = ANY(%s)", (list(course_ids),))
+            courses = _courses_from_rows(await cursor.fetchall())
+            # Names the patched courses may reference for the first time
+            referenced = {
+                "universities": {c.uni_id for c in courses},
+                "books": {c.book_id for c in courses},
+                "topics": {t for c in courses for t in c.topic_ids},
+                "instructors": {i for c in courses for i in c.instructor_ids},
+            }
+            names = {kind: await _fetch_names(cursor, kind, ids) for kind, ids in referenced.items() if ids}
+            # A rename, insert or delete moves other courses too
+            await cursor.execute(ORDER_QUERY)
+            order = await cursor.fetchall()
+
+        for kind, values in names.items():
+            _catalog.names[kind].update(values)
+        found = set()
+        for course in courses:
+            _catalog._put(course)
+            found.add(course.course_id)
+        for course_id in set(course_ids) - found:
+            _catalog._remove(course_id)
+        _catalog._set_order(order)
+        _catalog.version += 1
+        _changed(course_ids)
+
+async def ensure_loaded():
+    """The current snapshot, loading it first if startup could not"""
+    if _catalog.loaded_at is None:
+        await load_catalog()
+    return _catalog
+
+async def notify_changed(cursor, course_ids=None):
+    """Tell every worker that courses changed; None means reload everything.
+
+    Runs on the caller's cursor so the notification is only delivered if
+    the write transaction commits.
+    """
+    payload = {"courses": sorted(set(course_ids))} if course_ids is not None else {"full": True}
+    await cursor.execute("SELECT pg_notify(%s, %s)", (CATALOG_CHANNEL, json.dumps(payload)))
+
+async def _apply_notification(payload):
+    try:
+        message = json.loads(payload)
+    except ValueError:
+        message = {"full": True}
+    if message.get("full") or not message.get("courses"):
+        await load_catalog()
+    else:
+        await reload_courses(message["courses"])
+
+async def _listen():
+    """Follow catalog notifications on a dedicated connection, reconnecting on failure"""
+    while True:
+        try:
+            conn = await psycopg.AsyncConnection.connect(await get_conninfo(), autocommit=True)
+            async with conn:
+                await conn.execute(f"LISTEN {CATALOG_CHANNEL}")
+                # Anything may have changed while nobody was listening
+                await load_catalog()
+                async for notification in conn.notifies():
+                    try:
+                        await _apply_notification(notification.payload)
+                    except Exception as e:
+                        print(f"Error applying catalog change: {e}")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Catalog listener disconnected: {e}")
+        await asyncio.sleep(CATALOG_LISTEN_RETRY)
+
+async def _refresh_periodically():
+    while True:
+        await asyncio.sleep(CATALOG_REFRESH_INTERVAL)
+        try:
+            await load_catalog()
+        except Exception as e:
+            print(f"Error refreshing course catalog: {e}")
+
+async def start_catalog():
+    """Start listening for changes; the listener performs the initial load"""
+    global _listener_task, _refresh_task
+    if _listener_task is None:
+        _listener_task = asyncio.create_task(_listen())
+    if _refresh_task is None:
+        _refresh_task = asyncio.create_task(_refresh_periodically())
+
+async def stop_catalog():
+    global _listener_task, _refresh_task
+    for task in (_listener_task, _refresh_task):
+        if task is not None:
+            task.cancel()
+    _listener_task = _refresh_task = None
+
+def get_catalog_stats():
+    return {
+        "courses": len(_catalog.courses),
+        "version": _catalog.version,
+        "loaded_at": _catalog.loaded_at,
+        "listening": _listener_task is not None and not _listener_task.done(),
+    }
@@ -0,0 +1,159 @@
+"""
+Bulk enrollment.
+
+Uploaded (student email, course_id) rows are streamed into a temporary
+staging table with COPY. One statement then resolves students and courses,
+rejects duplicates and missing prerequisites set-wise and inserts every
+valid pair, so the cost is a handful of round trips whatever the upload
+size. Rows that could not be enrolled come back with the reason, keyed by
+their position in the upload.
+"""
+from fastapi import HTTPException, status
+from pydantic import ValidationError
+from app.models import BulkEnrollmentRow, BulkEnrollmentError
+from app.streaming import csv_records
+import json
+
+STAGING_TABLE = "enrollment_staging"
+
+CREATE_STAGING = f"""
+    CREATE TEMP TABLE {STAGING_TABLE} (
+        Row_no INT PRIMARY KEY,
+        Email VARCHAR(255) NOT NULL,
+        Course_id INT NOT NULL
+    ) ON COMMIT DROP
+"""
+
+COPY_STAGING = f"COPY {STAGING_TABLE} (Row_no, Email, Course_id) FROM STDIN"
+
+# Every staged row gets at most one error, in the same order the single
+# enrollment endpoint checks them. A valid row that still loses the insert
+# to a concurrent enrollment is reported as already enrolled.
+ENROLL_STAGED = f"""
+    WITH resolved AS (
+        SELECT st.Row_no, st.Email, st.Course_id, s.Student_id,
+               c.Course_id AS Known_course,
+               ROW_NUMBER() OVER (
+                   PARTITION BY st.Email, st.Course_id ORDER BY st.Row_no
+               ) AS Occurrence
+        FROM {STAGING_TABLE} st
+        LEFT JOIN Student s ON s.Email = st.Email
+        LEFT JOIN Course c ON c.Course_id = st.Course_id
+    ),
+    missing AS (
+        SELECT r.Row_no, array_agg(p.Name ORDER BY p.Name) AS Names
+        FROM resolved r
+        JOIN Course_Prerequisites cp ON cp.Course_id = r.Known_course
+        JOIN Course p ON p.Course_id = cp.Prerequisite_Course_id
+        WHERE r.Student_id IS NOT NULL
+          AND NOT EXISTS (
+              SELECT 1 FROM Enrolled_in e
+              WHERE e.Student_id = r.Student_id
+                AND e.Course_id = cp.Prerequisite_Course_id
+                AND e.Status = 'Completed'
+          )
+        GROUP BY r.Row_no
+    ),
+    checked AS (
+        SELECT r.Row_no, r.Email, r.Course_id, r.Student_id,
+               CASE
+                   WHEN r.Student_id IS NULL THEN 'Student not found'
+                   WHEN r.Known_course IS NULL THEN 'Course not found'
+                   WHEN r.Occurrence > 1 THEN 'Duplicate row in upload'
+                   WHEN EXISTS (
+                       SELECT 1 FROM Enrolled_in e
+                       WHERE e.Student_id = r.Student_id AND e.Course_id = r.Course_id
+                   ) THEN 'Already enrolled in this course'
+                   WHEN m.Names IS NOT NULL
+                       THEN 'Prerequisites not completed: ' || array_to_string(m.Names, ', ')
+               END AS Error
+        FROM resolved r
+        LEFT JOIN missing m ON m.Row_no = r.Row_no
+    ),
+    inserted AS (
+        INSERT INTO Enrolled_in (Student_id, Course_id, Status)
+        SELECT Student_id, Course_id, 'Pending'
+        FROM checked
+        WHERE Error IS NULL
+        ON CONFLICT (Student_id, Course_id) DO NOTHING
+        RETURNING Student_id, Course_id
+    )
+    SELECT c.Row_no, c.Email, c.Course_id,
+           COALESCE(c.Error, 'Already enrolled in this course')
+    FROM checked c
+    LEFT JOIN inserted i
+        ON c.Error IS NULL AND i.Student_id = c.Student_id AND i.Course_id = c.Course_id
+    WHERE c.Error IS NOT NULL OR i.Student_id IS NULL
+    ORDER BY c.Row_no
+"""
+
+def _parse_row(row_no, email, course_id):
+    """(row_no, email, course_id) ready for COPY, or the row's error"""
+    try:
+        row = BulkEnrollmentRow(email=email, course_id=course_id)
+    except ValidationError as e:
+        return BulkEnrollmentError(
+            row=row_no,
+            email=None if email is None else str(email),
+            course_id=course_id if isinstance(course_id, int) else None,
+            error=f"Invalid row: {e.errors()[0]['msg']}"
+        )
+    return (row_no, row.email.strip(), row.course_id)
+
+async def json_rows(request):
+    """Rows of a JSON array of {"email": ..., "course_id": ...} objects"""
+    try:
+        body = await request.json()
+    except json.JSONDecodeError:
+        body = None
+    if not isinstance(body, list):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Expected a JSON array of {email, course_id} objects"
+        )
+
+    for row_no, item in enumerate(body, 1):
+        if not isinstance(item, dict):
+            yield BulkEnrollmentError(
+                row=row_no, email=None, course_id=None,
+                error="Invalid row: expected an object"
+            )
+            continue
+        yield _parse_row(row_no, item.get("email"), item.get("course_id"))
+
+async def csv_rows(request):
+    """Rows of an `email,course_id` CSV body; a header line is optional"""
+    row_no = 0
+    async for record in csv_records(request):
+        if row_no == 0 and record[0].strip().lower() == "email":
+            continue
+        row_no += 1
+        if len(record) != 2:
+            yield BulkEnrollmentError(
+                row=row_no, email=None, course_id=None,
+                error="Invalid row: expected 2 columns, email and course_id"
+            )
+            continue
+        yield _parse_row(row_no, record[0], record[1].strip())
+
+async def stage_rows(cursor, rows):
+    """COPY parsed rows into the staging table; returns (received, parse errors)"""
+    await cursor.execute(CREATE_STAGING)
+    received = 0
+    errors = []
+    async with cursor.copy(COPY_STAGING) as copy:
+        async for row in rows:
+            received += 1
+            if isinstance(row, BulkEnrollmentError):
+                errors.append(row)
+            else:
+                await copy.write_row(row)
+    return received, errors
+
+async def enroll_staged(cursor):
+    """Insert every valid staged row; returns the errors of the others"""
+    await cursor.execute(ENROLL_STAGED)
+    return [
+        BulkEnrollmentError(row=row_no, email=email, course_id=course_id, error=error)
+        for row_no, email, course_id, error in await cursor.fetchall()
+    ]
@@ -0,0 +1,158 @@
+"""
+Set-based grading.
+
+A batch of (student_id, score, status) grades for one course is applied
+with a single UPDATE ... FROM unnest(...) statement, whatever its size.
+Students that are not enrolled in the course come back as errors instead
+of failing the batch. CSV gradebook imports feed the same statement one
+chunk at a time.
+"""
+from fastapi import HTTPException, status
+from pydantic import ValidationError
+from app.models import StudentGrade, GradeError, GradebookError, GradebookImportResponse
+
+APPLY_GRADES = """
+    WITH grades AS (
+        SELECT *
+        FROM unnest(%s::int[], %s::numeric[], %s::varchar[]) AS g(Student_id, Score, Status)
+    ),
+    updated AS (
+        UPDATE Enrolled_in e
+        SET Evaluation_score = g.Score, Status = g.Status
+        FROM grades g
+        WHERE e.Course_id = %s AND e.Student_id = g.Student_id
+        RETURNING e.Student_id
+    )
+    SELECT (SELECT COUNT(*) FROM updated),
+           ARRAY(
+               SELECT g.Student_id FROM grades g
+               WHERE NOT EXISTS (SELECT 1 FROM updated u WHERE u.Student_id = g.Student_id)
+           )
+"""
+
+async def apply_grades(cursor, course_id, grades):
+    """Apply StudentGrade rows to course_id; returns (updated count, errors).
+
+    A student listed twice keeps the first grade: UPDATE ... FROM would
+    pick one of the duplicates arbitrarily.
+    """
+    errors = []
+    unique = {}
+    for grade in grades:
+        if grade.student_id in unique:
+            errors.append(GradeError(student_id=grade.student_id, error="Duplicate student in batch"))
+        else:
+            unique[grade.student_id] = grade
+
+    await cursor.execute(APPLY_GRADES, (
+        list(unique),
+        [g.evaluation_score for g in unique.values()],
+        [g.status for g in unique.values()],
+        course_id,
+    ))
+    updated, not_enrolled = await cursor.fetchone()
+    errors.extend(
+        GradeError(student_id=student_id, error="Student is not enrolled in this course")
+        for student_id in not_enrolled
+    )
+    return updated, errors
+
+# ==================== CSV GRADEBOOK ====================
+
+GRADEBOOK_HEADER = ("student_id", "name", "email", "evaluation_score", "status")
+GRADEBOOK_QUERY = """
+    SELECT s.Student_id, s.Name, s.Email, e.Evaluation_score, e.Status
+    FROM Enrolled_in e
+    JOIN Student s ON e.Student_id = s.Student_id
+    WHERE e.Course_id = %s
+    ORDER BY s.Name
+"""
+# Rows applied per UPDATE statement during an import
+GRADEBOOK_CHUNK_SIZE = 1000
+
+def _missing_header():
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Gradebook CSV needs a header with student_id, evaluation_score and status columns"
+    )
+
+def _gradebook_columns(header):
+    """Positions of the columns an import needs, by header name"""
+    names = [name.strip().lower() for name in header]
+    try:
+        return tuple(names.index(name) for name in ("student_id", "evaluation_score", "status"))
+    except ValueError:
+        raise _missing_header()
+
+def _parse_grade(row_no, record, columns):
+    """StudentGrade for one record, None for an ungraded row, or its error"""
+    id_col, score_col, status_col = columns
+    if len(record) <= max(columns):
+        return GradebookError(row=row_no, student_id=None, error="Invalid row: missing columns")
+    try:
+        student_id = int(record[id_col])
+    except ValueError:
+        return GradebookError(row=row_no, student_id=None, error="Invalid row: student_id must be an integer")
+    if not record[score_col].strip():
+        return None
+    try:
+        return StudentGrade(
+            student_id=student_id,
+            evaluation_score=record[score_col].strip(),
+            status=record[status_col].strip()
+        )
+    except ValidationError as e:
+        return GradebookError(row=row_no, student_id=student_id, error=f"Invalid row: {e.errors()[0]['msg']}")
+
+async def _apply_chunk(cursor, course_id, chunk):
+    """Apply {student_id: (row_no, grade)}; returns (updated, errors)"""
+    updated, grade_errors = await apply_grades(cursor, course_id, [grade for _, grade in chunk.values()])
+    return updated, [
+        GradebookError(row=chunk[e.student_id][0], student_id=e.student_id, error=e.error)
+        for e in grade_errors
+    ]
+
+async def import_gradebook(cursor, course_id, records):
+    """Apply a gradebook CSV, given as async CSV records, in chunks.
+
+    Only the current chunk and the ids seen so far are held in memory.
+    Rows without a score are skipped, so an exported roster can be filled
+    in and uploaded as is.
+    """
+    result = GradebookImportResponse(received=0, updated=0, skipped=0, errors=[])
+    columns = None
+    seen = set()
+    chunk = {}
+
+    async for record in records:
+        if columns is None:
+            columns = _gradebook_columns(record)
+            continue
+        result.received += 1
+        row_no = result.received
+        grade = _parse_grade(row_no, record, columns)
+        if grade is None:
+            result.skipped += 1
+        elif isinstance(grade, GradebookError):
+            result.errors.append(grade)
+        elif grade.student_id in seen:
+            result.errors.append(GradebookError(
+                row=row_no, student_id=grade.student_id, error="Duplicate student in gradebook"
+            ))
+        else:
+            seen.add(grade.student_id)
+            chunk[grade.student_id] = (row_no, grade)
+            if len(chunk) == GRADEBOOK_CHUNK_SIZE:
+                updated, errors = await _apply_chunk(cursor, course_id, chunk)
+                result.updated += updated
+                result.errors.extend(errors)
+                chunk = {}
+
+    if columns is None:
+        raise _missing_header()
+    if chunk:
+        updated, errors = await _apply_chunk(cursor, course_id, chunk)
+        result.updated += updated
+        result.errors.extend(errors)
+    result.errors.sort(key=lambda e: e.row)
+    return result
@@ -0,0 +1,198 @@
+"""
+Per-request query instrumentation.
+
+Every statement goes through InstrumentedCursor (or, for named cursors,
+InstrumentedServerCursor), which records its fingerprint, duration and
+row count against the current request and a process-wide table. That
+covers execute(), executemany() (one entry per call), COPY and the
+FETCH round trips of a server-side cursor.
+
+Repeated fingerprints within one request are reported as likely N+1
+loops: logged, returned in the X-DB-Repeated-Queries header and kept in
+a bounded list of recent offending requests for /internal/db-stats.
+Statements a streamed body runs after its headers went out reach only
+the process-wide table.
+"""
+import logging
+import os
+import re
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from contextvars import ContextVar
+from psycopg import AsyncCursor, AsyncServerCursor
+
+logger = logging.getLogger(__name__)
+
+# Warn when one fingerprint runs more than this many times in a request
+DB_N_PLUS_ONE_THRESHOLD = int(os.getenv("DB_N_PLUS_ONE_THRESHOLD", "10"))
+# Cap on distinct fingerprints kept in the process-wide table
+MAX_FINGERPRINTS = 500
+# Recent requests with repeated statements kept for /internal/db-stats
+MAX_OFFENDING_REQUESTS = 50
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%s|\$\d+")
+_IN_LIST = re.compile(r"IN \((?:\?, )*\?\)", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+@lru_cache(maxsize=1024)
+def _normalize(query):
+    query = _STRING_LITERAL.sub("?", query)
+    query = _PLACEHOLDER.sub("?", query)
+    query = _NUMBER_LITERAL.sub("?", query)
+    query = _WHITESPACE.sub(" ", query).strip()
+    return _IN_LIST.sub("IN (...)", query)
+
+def fingerprint(query):
+    """Normalize a statement so different parameter values share one key"""
+    return _normalize(query if isinstance(query, str) else str(query))
+
+class RequestQueryStats:
+    """Queries issued while serving one HTTP request"""
+
+    def __init__(self, scope):
+        self.scope = scope
+        self.query_count = 0
+        self.db_time_ms = 0.0
+        self.fingerprints = {}
+
+    @property
+    def route(self):
+        route = self.scope.get("route")
+        if route is not None:
+            return getattr(route, "path", self.scope.get("path"))
+        return self.scope.get("path")
+
+    def summary(self):
+        repeated = {fp: n for fp, n in self.fingerprints.items() if n > DB_N_PLUS_ONE_THRESHOLD}
+        return {
+            "route": self.route,
+            "query_count": self.query_count,
+            "db_time_ms": round(self.db_time_ms, 3),
+            "repeated_queries": repeated,
+        }
+
+_current_request = ContextVar("db_request_stats", default=None)
+
+# fingerprint -> aggregate counters across all requests
+_query_table = {}
+
+# Summaries of the latest requests that repeated a statement, newest last
+_offending_requests = deque(maxlen=MAX_OFFENDING_REQUESTS)
+
+def start_request(scope):
+    """Begin collecting query stats for a request; returns a reset token"""
+    stats = RequestQueryStats(scope)
+    return stats, _current_request.set(stats)
+
+def finish_request(stats, token):
+    """Stop collecting for a request and return its summary"""
+    _current_request.reset(token)
+    summary = stats.summary()
+    if summary["repeated_queries"]:
+        _offending_requests.append(dict(summary, at=time.time()))
+    return summary
+
+def record_query(query, duration_ms, rows):
+    """Account one executed statement to the current request and globally"""
+    fp = fingerprint(query)
+    request = _current_request.get()
+    route = None
+
+    if request is not None:
+        route = request.route
+        request.query_count += 1
+        request.db_time_ms += duration_ms
+        count = request.fingerprints.get(fp, 0) + 1
+        request.fingerprints[fp] = count
+        if count == DB_N_PLUS_ONE_THRESHOLD + 1:
+            logger.warning(
+                "Possible N+1 query in %s: statement ran more than %d times: %s",
+                route, DB_N_PLUS_ONE_THRESHOLD, fp
+            )
+
+    entry = _query_table.get(fp)
+    if entry is None:
+        if len(_query_table) >= MAX_FINGERPRINTS:
+            return
+        entry = _query_table[fp] = {
+            "count": 0, "total_ms": 0.0, "max_ms": 0.0, "rows": 0, "routes": set()
+        }
+    entry["count"] += 1
+    entry["total_ms"] += duration_ms
+    entry["max_ms"] = max(entry["max_ms"], duration_ms)
+    entry["rows"] += max(rows, 0)
+    if route is not None:
+        entry["routes"].add(route)
+
+def get_query_stats(limit=50, order_by="total_ms"):
+    """Top fingerprints across the process, heaviest first"""
+    rows = []
+    for fp, entry in _query_table.items():
+        rows.append({
+            "fingerprint": fp,
+            "count": entry["count"],
+            "total_ms": round(entry["total_ms"], 3),
+            "avg_ms": round(entry["total_ms"] / entry["count"], 3),
+            "max_ms": round(entry["max_ms"], 3),
+            "rows": entry["rows"],
+            "routes": sorted(entry["routes"]),
+        })
+    rows.sort(key=lambda r: r.get(order_by, 0), reverse=True)
+    return rows[:limit]
+
+def get_offending_requests():
+    """Recent requests that repeated a statement, newest first"""
+    return list(reversed(_offending_requests))
+
+class InstrumentedCursor(AsyncCursor):
+    """Async cursor that times every statement it sends and records it"""
+
+    async def execute(self, query, params=None, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await super().execute(query, params, **kwargs)
+        finally:
+            record_query(query, (time.perf_counter() - start) * 1000, self.rowcount)
+
+    async def executemany(self, query, params_seq, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await super().executemany(query, params_seq, **kwargs)
+        finally:
+            record_query(query, (time.perf_counter() - start) * 1000, self.rowcount)
+
+    @asynccontextmanager
+    async def copy(self, statement, params=None, **kwargs):
+        # Timed from COPY until the last row is written and acknowledged
+        start = time.perf_counter()
+        try:
+            async with super().copy(statement, params, **kwargs) as copy:
+                yield copy
+        finally:
+            record_query(statement, (time.perf_counter() - start) * 1000, self.rowcount)
+
+class InstrumentedServerCursor(AsyncServerCursor):
+    """Named cursor recording its DECLARE and every FETCH round trip"""
+
+    async def execute(self, query, params=None, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await super().execute(query, params, **kwargs)
+        finally:
+            record_query(query, (time.perf_counter() - start) * 1000, self.rowcount)
+
+    async def fetchmany(self, size=0):
+        start = time.perf_counter()
+        rows = await super().fetchmany(size)
+        record_query("FETCH FORWARD ? FROM cursor", (time.perf_counter() - start) * 1000, len(rows))
+        return rows
+
+    async def fetchall(self):
+        start = time.perf_counter()
+        rows = await super().fetchall()
+        record_query("FETCH FORWARD ALL FROM cursor", (time.perf_counter() - start) * 1000, len(rows))
+        return rows
@@ -1,10 +1,21 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
+import time
 import uvicorn
 
 # Import database functions
-from app.database import init_db_pool, close_db_pool
+from app.database import (
+    init_db_pool, close_db_pool, get_pool_stats, get_prepared_statement_stats
+)
+from app.catalog import start_catalog, stop_catalog, get_catalog_stats
+from app.authz import get_authz_stats
+from app.topics import get_topic_cache_stats
+from app.instrumentation import (
+    start_request, finish_request, get_query_stats, get_offending_requests
+)
+from app.metrics import REQUESTS_IN_FLIGHT, observe_request, route_template
 
 # Import routers
 from app.routers.auth import router as auth_router
@@ -18,11 +29,13 @@ async def lifespan(app: FastAPI):
     """Lifespan event handler for startup and shutdown"""
     # Startup
     print("Starting up application...")
-    init_db_pool()
+    await init_db_pool()
+    await start_catalog()
     yield
     # Shutdown
     print("Shutting down application...")
-    close_db_pool()
+    await stop_catalog()
+    await close_db_pool()
 
 # Create FastAPI application
 app = FastAPI(
@@ -41,6 +54,33 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def query_stats_middleware(request: Request, call_next):
+    """Count the queries each request runs, report them in headers and record metrics.
+
+    X-DB-Repeated-Queries is the number of statements the request ran more
+    than DB_N_PLUS_ONE_THRESHOLD times, i.e. likely N+1 loops.
+    """
+    stats, token = start_request(request.scope)
+    in_flight = REQUESTS_IN_FLIGHT.labels(request.method)
+    in_flight.inc()
+    start = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+    finally:
+        summary = finish_request(stats, token)
+        in_flight.dec()
+        observe_request(
+            request.method, route_template(request.scope), status_code,
+            time.perf_counter() - start, stats
+        )
+    response.headers["X-DB-Query-Count"] = str(stats.query_count)
+    response.headers["X-DB-Time-Ms"] = f"{stats.db_time_ms:.3f}"
+    response.headers["X-DB-Repeated-Queries"] = str(len(summary["repeated_queries"]))
+    return response
+
 # Include routers
 app.include_router(auth_router)
 app.include_router(admin_router)
@@ -61,8 +101,33 @@ async def root():
 # Health check endpoint
 @app.get("/health")
 async def health_check():
-    """Health check endpoint"""
-    return {"status": "healthy"}
+    """Health check endpoint with database pool, prepared statement, catalog and cache stats"""
+    return {
+        "status": "healthy",
+        "db_pool": get_pool_stats(),
+        "prepared_statements": get_prepared_statement_stats(),
+        "catalog": get_catalog_stats(),
+        "authz_cache": get_authz_stats(),
+        "topic_cache": get_topic_cache_stats()
+    }
+
+# Prometheus scrape endpoint
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics"""
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+# Query instrumentation endpoint
+@app.get("/internal/db-stats")
+async def db_stats(limit: int = 50, order_by: str = "total_ms"):
+    """Heaviest query fingerprints and recent likely N+1 requests seen by this worker"""
+    if order_by not in ("total_ms", "count", "max_ms", "avg_ms", "rows"):
+        raise HTTPException(status_code=400, detail="Invalid order_by")
+    return {
+        "queries": get_query_stats(limit=limit, order_by=order_by),
+        "repeated_query_requests": get_offending_requests(),
+        "db_pool": get_pool_stats()
+    }
 
 # Main entry point
 if __name__ == "__main__":
@@ -0,0 +1,95 @@
+"""
+Prometheus metrics for request latency, query load and pool saturation.
+"""
+from prometheus_client import Counter, Gauge, Histogram, REGISTRY
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from app.database import get_pool_stats
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+)
+
+REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "HTTP requests currently being served",
+    ["method"]
+)
+
+REQUESTS_TOTAL = Counter(
+    "http_requests_total",
+    "HTTP requests served",
+    ["method", "route", "status"]
+)
+
+DB_QUERIES_PER_REQUEST = Histogram(
+    "db_queries_per_request",
+    "SQL statements issued while serving one request",
+    ["route"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, 250, 500, 1000)
+)
+
+DB_TIME_PER_REQUEST = Histogram(
+    "db_time_per_request_seconds",
+    "Time spent waiting on SQL statements while serving one request",
+    ["route"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+)
+
+def route_template(scope):
+    """Route path template (e.g. /student/profile/{email}) to keep label cardinality bounded"""
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+def observe_request(method, route, status_code, duration, query_stats):
+    """Record one finished request"""
+    status = str(status_code)
+    REQUEST_LATENCY.labels(method, route, status).observe(duration)
+    REQUESTS_TOTAL.labels(method, route, status).inc()
+    DB_QUERIES_PER_REQUEST.labels(route).observe(query_stats.query_count)
+    DB_TIME_PER_REQUEST.labels(route).observe(query_stats.db_time_ms / 1000)
+
+class PoolCollector:
+    """Reads pool gauges from get_pool_stats() at scrape time"""
+
+    GAUGES = {
+        "size": "Open connections",
+        "max_size": "Configured maximum connections",
+        "checked_out": "Connections currently checked out",
+        "available": "Idle connections ready for checkout",
+        "waiting": "Requests queued waiting for a connection",
+        "saturation": "Fraction of max_size currently checked out",
+    }
+
+    COUNTERS = {
+        "acquired": "Connections handed out",
+        "timeouts": "Checkouts that timed out waiting",
+        "rejected": "Checkouts rejected because the wait queue was full",
+        "check_failures": "Connections that failed the checkout ping",
+        "read_retries": "Read queries retried on a fresh connection",
+    }
+
+    def collect(self):
+        stats = get_pool_stats()
+        pools = {"primary": stats}
+        if "replica" in stats:
+            pools["replica"] = stats["replica"]
+
+        for name, doc in self.GAUGES.items():
+            family = GaugeMetricFamily(f"db_pool_{name}", doc, labels=["pool"])
+            for pool, values in pools.items():
+                if name in values:
+                    family.add_metric([pool], values[name])
+            yield family
+
+        for name, doc in self.COUNTERS.items():
+            yield CounterMetricFamily(f"db_pool_{name}", doc, value=stats[name])
+
+        yield GaugeMetricFamily(
+            "db_pool_wait_ms_max", "Longest connection checkout wait in milliseconds",
+            value=stats["wait_ms_max"]
+        )
+
+REGISTRY.register(PoolCollector())
@@ -103,6 +103,10 @@ class AddInstructorToCourse(BaseModel):
     instructor_id: int
     course_id: int
 
+class BulkEnrollmentRow(BaseModel):
+    email: str = Field(..., max_length=255)
+    course_id: int
+
 # ==================== STUDENT MODELS ====================
 
 class StudentProfileUpdate(BaseModel):
@@ -118,6 +122,7 @@ class StudentProfileUpdate(BaseModel):
         return v
 
 class CourseSearch(BaseModel):
+    q: Optional[str] = Field(None, max_length=255)  # free text, ranked by relevance
     name: Optional[str] = None
     course_type: Optional[str] = None
     difficulty_level: Optional[str] = None
@@ -125,6 +130,9 @@ class CourseSearch(BaseModel):
     max_price: Optional[Decimal] = None
     university_name: Optional[str] = None
     topic_name: Optional[str] = None
+    limit: int = Field(50, ge=1, le=200)
+    cursor: Optional[str] = None  # next_cursor from the previous page
+    include_facets: bool = False
 
 class EnrollInCourse(BaseModel):
     course_id: int
@@ -161,6 +169,21 @@ class EvaluateStudent(BaseModel):
             raise ValueError('Invalid status')
         return v
 
+class StudentGrade(BaseModel):
+    student_id: int
+    evaluation_score: Decimal = Field(..., ge=0, le=100)
+    status: str
+    
+    @field_validator('status')
+    def validate_status(cls, v):
+        if v not in ['Pending', 'Completed']:
+            raise ValueError('Invalid status')
+        return v
+
+class BulkEvaluateStudents(BaseModel):
+    course_id: int
+    grades: List[StudentGrade] = Field(..., min_length=1)
+
 class ChangeCourseBook(BaseModel):
     course_id: int
     book_id: int
@@ -195,8 +218,8 @@ class CourseResponse(BaseModel):
     course_name: str
     price: Decimal
     duration: int
-    course_type: str
-    difficulty_level: str
+    course_type: Optional[str]
+    difficulty_level: Optional[str]
     notes_url: Optional[str]
     video_url: Optional[str]
     university_name: str
@@ -205,6 +228,57 @@ class CourseResponse(BaseModel):
     topics: List[str]
     prerequisites: List[str]
 
+class FacetCount(BaseModel):
+    value: Optional[str]
+    count: int
+
+class PriceBucket(BaseModel):
+    min_price: Decimal
+    max_price: Optional[Decimal]  # None for the open-ended top bucket
+    count: int
+
+class CourseFacets(BaseModel):
+    course_type: List[FacetCount]
+    difficulty_level: List[FacetCount]
+    university: List[FacetCount]
+    topic: List[FacetCount]
+    price: List[PriceBucket]
+
+class CourseSearchResponse(BaseModel):
+    courses: List[CourseResponse]
+    next_cursor: Optional[str] = None  # None on the last page
+    facets: Optional[CourseFacets] = None  # counts over all matches, when include_facets
+
+class BulkEnrollmentError(BaseModel):
+    row: int  # 1-based position in the upload, not counting a CSV header
+    email: Optional[str]
+    course_id: Optional[int]
+    error: str
+
+class BulkEnrollmentResponse(BaseModel):
+    received: int
+    enrolled: int
+    errors: List[BulkEnrollmentError]
+
+class GradeError(BaseModel):
+    student_id: int
+    error: str
+
+class BulkEvaluationResponse(BaseModel):
+    updated: int
+    errors: List[GradeError]
+
+class GradebookError(BaseModel):
+    row: int  # 1-based data row, not counting the header
+    student_id: Optional[int]
+    error: str
+
+class GradebookImportResponse(BaseModel):
+    received: int
+    updated: int
+    skipped: int  # rows without a score
+    errors: List[GradebookError]
+
 class StudentCourseResponse(BaseModel):
     course_id: int
     course_name: str
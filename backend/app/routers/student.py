@@ -1,41 +1,48 @@
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from app.models import (
     StudentProfileUpdate, CourseSearch, EnrollInCourse,
-    MessageResponse, CourseResponse, StudentCourseResponse
+    MessageResponse, CourseResponse, CourseSearchResponse, StudentCourseResponse
 )
-from app.database import get_db_cursor
+from psycopg import AsyncCursor
+from app.database import TransactionRoute, get_db, get_autocommit_db, get_db_cursor, execute_prepared
+from app.search import (
+    build_search_query, build_facet_query, facets_from_rows,
+    row_to_course, next_page_cursor, search_catalog, iter_catalog_matches, catalog_start
+)
+from app.catalog import ensure_loaded
+from app.streaming import wants_ndjson, ndjson_query_response, ndjson_items_response
 from typing import List
+import hashlib
 
-router = APIRouter(prefix="/student", tags=["Student"])
+router = APIRouter(prefix="/student", tags=["Student"], route_class=TransactionRoute)
 
 # ==================== PROFILE MANAGEMENT ====================
 
 @router.get("/profile/{email}")
-async def get_student_profile(email: str):
+async def get_student_profile(email: str, cursor: AsyncCursor = Depends(get_autocommit_db)):
     """Get student profile"""
     try:
-        with get_db_cursor() as cursor:
-            cursor.execute("""
-                SELECT Student_id, Name, Email, DOB, Country, Skill_level
-                FROM Student
-                WHERE Email = %s
-            """, (email,))
-            result = cursor.fetchone()
-            
-            if not result:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="Student not found"
-                )
-            
-            return {
-                "student_id": result[0],
-                "name": result[1],
-                "email": result[2],
-                "dob": result[3].isoformat() if result[3] else None,
-                "country": result[4],
-                "skill_level": result[5]
-            }
+        await cursor.execute("""
+            SELECT Student_id, Name, Email, DOB, Country, Skill_level
+            FROM Student
+            WHERE Email = %s
+        """, (email,))
+        result = await cursor.fetchone()
+        
+        if not result:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Student not found"
+            )
+        
+        return {
+            "student_id": result[0],
+            "name": result[1],
+            "email": result[2],
+            "dob": result[3].isoformat() if result[3] else None,
+            "country": result[4],
+            "skill_level": result[5]
+        }
     except HTTPException:
         raise
     except Exception as e:
@@ -45,47 +52,46 @@ async def get_student_profile(email: str):
         )
 
 @router.put("/profile/{email}", response_model=MessageResponse)
-async def update_student_profile(email: str, profile: StudentProfileUpdate):
+async def update_student_profile(email: str, profile: StudentProfileUpdate, cursor: AsyncCursor = Depends(get_db)):
     """Update student profile (cannot change email)"""
     try:
-        with get_db_cursor() as cursor:
-            # Check if student exists
-            cursor.execute("SELECT Student_id FROM Student WHERE Email = %s", (email,))
-            if not cursor.fetchone():
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="Student not found"
-                )
-            
-            # Build dynamic update query
-            update_fields = []
-            params = []
-            
-            if profile.name is not None:
-                update_fields.append("Name = %s")
-                params.append(profile.name)
-            if profile.dob is not None:
-                update_fields.append("DOB = %s")
-                params.append(profile.dob)
-            if profile.country is not None:
-                update_fields.append("Country = %s")
-                params.append(profile.country)
-            if profile.skill_level is not None:
-                update_fields.append("Skill_level = %s")
-                params.append(profile.skill_level)
-            
-            if not update_fields:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="No fields to update"
-                )
-            
-            params.append(email)
-            query = f"UPDATE Student SET {', '.join(update_fields)} WHERE Email = %s"
-            cursor.execute(query, params)
-            
-            return MessageResponse(message="Profile updated successfully")
-    
+        # Check if student exists
+        await execute_prepared(cursor, "student_id_by_email", (email,))
+        if not await cursor.fetchone():
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Student not found"
+            )
+        
+        # Build dynamic update query
+        update_fields = []
+        params = []
+        
+        if profile.name is not None:
+            update_fields.append("Name = %s")
+            params.append(profile.name)
+        if profile.dob is not None:
+            update_fields.append("DOB = %s")
+            params.append(profile.dob)
+        if profile.country is not None:
+            update_fields.append("Country = %s")
+            params.append(profile.country)
+        if profile.skill_level is not None:
+            update_fields.append("Skill_level = %s")
+            params.append(profile.skill_level)
+        
+        if not update_fields:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="No fields to update"
+            )
+        
+        params.append(email)
+        query = f"UPDATE Student SET {', '.join(update_fields)} WHERE Email = %s"
+        await cursor.execute(query, params)
+        
+        return MessageResponse(message="Profile updated successfully")
+
     except HTTPException:
         raise
     except Exception as e:
@@ -96,107 +102,90 @@ async def update_student_profile(email: str, profile: StudentProfileUpdate):
 
 # ==================== COURSE SEARCH AND ENROLLMENT ====================
 
-@router.post("/search-courses", response_model=List[CourseResponse])
-async def search_courses(search: CourseSearch):
-    """Search for courses based on various criteria"""
+@router.post("/search-courses", response_model=CourseSearchResponse)
+async def search_courses(search: CourseSearch, request: Request):
+    """Search for courses based on various criteria, one page at a time.
+
+    With q, results are full-text matches ranked by relevance. With
+    `Accept: application/x-ndjson` every match after the cursor is
+    streamed, one course per line, ignoring limit and include_facets.
+    """
+    try:
+        ranked = bool(search.q and search.q.strip())
+        if wants_ndjson(request):
+            if not ranked:
+                catalog = await ensure_loaded()
+                start = await catalog_start(catalog, search)
+                return ndjson_items_response(
+                    catalog.to_response(c) for c in iter_catalog_matches(catalog, search, start)
+                )
+            query, params = build_search_query(search, paged=False)
+            return await ndjson_query_response(query, params, row_to_course)
+        
+        if not ranked:
+            # Plain filters are answered from the in-memory catalog
+            catalog = await ensure_loaded()
+            courses, next_cursor, facets = search_catalog(
+                catalog, search, await catalog_start(catalog, search)
+            )
+            return CourseSearchResponse(courses=courses, next_cursor=next_cursor, facets=facets)
+        
+        query, params = build_search_query(search)
+        facets = None
+        async with get_db_cursor(readonly=True) as cursor:
+            if not search.include_facets:
+                await cursor.execute(query, params)
+                results = await cursor.fetchall()
+            else:
+                # Page and facet counts go out together in one round trip
+                facet_query, facet_params = build_facet_query(search)
+                async with cursor.connection.cursor() as facet_cursor:
+                    async with cursor.connection.pipeline():
+                        await cursor.execute(query, params)
+                        await facet_cursor.execute(facet_query, facet_params)
+                    results = await cursor.fetchall()
+                    facets = facets_from_rows(await facet_cursor.fetchall())
+        
+        return CourseSearchResponse(
+            courses=[row_to_course(row) for row in results[:search.limit]],
+            next_cursor=next_page_cursor(search, results),
+            facets=facets
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Database error: {str(e)}"
+        )
+
+@router.get("/eligible-courses/{email}", response_model=List[CourseResponse])
+async def get_eligible_courses(email: str, cursor: AsyncCursor = Depends(get_autocommit_db)):
+    """Courses the student is not enrolled in and has completed every prerequisite of"""
     try:
-        with get_db_cursor() as cursor:
-            # Build dynamic query
-            query = """
-                SELECT DISTINCT c.Course_id, c.Name, c.Price, c.Duration, c.Course_Type,
-                       c.Difficulty_level, c.Notes_URL, c.Video_URL,
-                       u.Name as uni_name, b.Name as book_name
-                FROM Course c
-                JOIN University u ON c.Uni_id = u.Uni_id
-                JOIN Book b ON c.Book_id = b.Book_id
-                LEFT JOIN Course_Topic ct ON c.Course_id = ct.Course_id
-                LEFT JOIN Topic t ON ct.Topic_id = t.Topic_id
-                WHERE 1=1
-            """
-            params = []
-            
-            if search.name:
-                query += " AND c.Name ILIKE %s"
-                params.append(f"%{search.name}%")
-            
-            if search.course_type:
-                query += " AND c.Course_Type = %s"
-                params.append(search.course_type)
-            
-            if search.difficulty_level:
-                query += " AND c.Difficulty_level = %s"
-                params.append(search.difficulty_level)
-            
-            if search.min_price is not None:
-                query += " AND c.Price >= %s"
-                params.append(search.min_price)
-            
-            if search.max_price is not None:
-                query += " AND c.Price <= %s"
-                params.append(search.max_price)
-            
-            if search.university_name:
-                query += " AND u.Name ILIKE %s"
-                params.append(f"%{search.university_name}%")
-            
-            if search.topic_name:
-                query += " AND t.Name ILIKE %s"
-                params.append(f"%{search.topic_name}%")
-            
-            query += " ORDER BY c.Name"
-            
-            cursor.execute(query, params)
-            results = cursor.fetchall()
-            
-            courses = []
-            for row in results:
-                course_id = row[0]
-                
-                # Get instructors
-                cursor.execute("""
-                    SELECT i.Name
-                    FROM Teaches t
-                    JOIN Instructor i ON t.Instructor_id = i.Instructor_id
-                    WHERE t.Course_id = %s
-                """, (course_id,))
-                instructors = [r[0] for r in cursor.fetchall()]
-                
-                # Get topics
-                cursor.execute("""
-                    SELECT t.Name
-                    FROM Course_Topic ct
-                    JOIN Topic t ON ct.Topic_id = t.Topic_id
-                    WHERE ct.Course_id = %s
-                """, (course_id,))
-                topics = [r[0] for r in cursor.fetchall()]
-                
-                # Get prerequisites
-                cursor.execute("""
-                    SELECT c.Name
-                    FROM Course_Prerequisites cp
-                    JOIN Course c ON cp.Prerequisite_Course_id = c.Course_id
-                    WHERE cp.Course_id = %s
-                """, (course_id,))
-                prerequisites = [r[0] for r in cursor.fetchall()]
-                
-                courses.append(CourseResponse(
-                    course_id=row[0],
-                    course_name=row[1],
-                    price=row[2],
-                    duration=row[3],
-                    course_type=row[4],
-                    difficulty_level=row[5],
-                    notes_url=row[6],
-                    video_url=row[7],
-                    university_name=row[8],
-                    book_name=row[9],
-                    instructors=instructors,
-                    topics=topics,
-                    prerequisites=prerequisites
-                ))
-            
-            return courses
-    
+        await execute_prepared(cursor, "student_enrollments", (email,))
+        rows = await cursor.fetchall()
+        if not rows:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Student not found"
+            )
+        
+        catalog = await ensure_loaded()
+        index = catalog.prerequisites
+        enrolled = {row[1] for row in rows if row[1] is not None}
+        completed = {row[1] for row in rows if row[3] == 'Completed'}
+        eligible = index.eligible(completed, excluded=enrolled)
+        
+        position = catalog.position
+        return [
+            catalog.to_response(catalog.courses[course_id])
+            for course_id in sorted((c for c in eligible if c in position), key=position.__getitem__)
+        ]
+
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -204,82 +193,42 @@ async def search_courses(search: CourseSearch):
         )
 
 @router.post("/enroll", response_model=MessageResponse)
-async def enroll_in_course(email: str, enrollment: EnrollInCourse):
+async def enroll_in_course(email: str, enrollment: EnrollInCourse, cursor: AsyncCursor = Depends(get_db)):
     """Enroll in a course (checks prerequisites)"""
     try:
-        with get_db_cursor() as cursor:
-            # Get student ID
-            cursor.execute("SELECT Student_id FROM Student WHERE Email = %s", (email,))
-            result = cursor.fetchone()
-            if not result:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="Student not found"
-                )
-            student_id = result[0]
-            
-            # Check if course exists
-            cursor.execute("SELECT Course_id FROM Course WHERE Course_id = %s", (enrollment.course_id,))
-            if not cursor.fetchone():
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="Course not found"
-                )
-            
-            # Check if already enrolled
-            cursor.execute("""
-                SELECT * FROM Enrolled_in
-                WHERE Student_id = %s AND Course_id = %s
-            """, (student_id, enrollment.course_id))
-            if cursor.fetchone():
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Already enrolled in this course"
-                )
-            
-            # Get prerequisites for the course
-            cursor.execute("""
-                SELECT Prerequisite_Course_id
-                FROM Course_Prerequisites
-                WHERE Course_id = %s
-            """, (enrollment.course_id,))
-            prerequisites = [row[0] for row in cursor.fetchall()]
-            
-            # Check if student has completed all prerequisites
-            for prereq_id in prerequisites:
-                cursor.execute("""
-                    SELECT Status
-                    FROM Enrolled_in
-                    WHERE Student_id = %s AND Course_id = %s
-                """, (student_id, prereq_id))
-                result = cursor.fetchone()
-                
-                if not result:
-                    # Get course name for error message
-                    cursor.execute("SELECT Name FROM Course WHERE Course_id = %s", (prereq_id,))
-                    prereq_name = cursor.fetchone()[0]
-                    raise HTTPException(
-                        status_code=status.HTTP_400_BAD_REQUEST,
-                        detail=f"Prerequisite not completed: {prereq_name}"
-                    )
-                
-                if result[0] != 'Completed':
-                    # Get course name for error message
-                    cursor.execute("SELECT Name FROM Course WHERE Course_id = %s", (prereq_id,))
-                    prereq_name = cursor.fetchone()[0]
-                    raise HTTPException(
-                        status_code=status.HTTP_400_BAD_REQUEST,
-                        detail=f"Prerequisite not completed: {prereq_name}"
-                    )
-            
-            # Enroll the student
-            cursor.execute("""
-                INSERT INTO Enrolled_in (Student_id, Course_id, Status)
-                VALUES (%s, %s, 'Pending')
-            """, (student_id, enrollment.course_id))
-            
-            return MessageResponse(message="Successfully enrolled in course")
-    
+        await execute_prepared(cursor, "enroll_student", {
+            "email": email, "course_id": enrollment.course_id
+        })
+        student_id, course_id, already_enrolled, missing, inserted = await cursor.fetchone()
+        
+        if student_id is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Student not found"
+            )
+        
+        if course_id is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Course not found"
+            )
+        
+        # A concurrent request may have enrolled first: the insert then
+        # hits the primary key and inserts nothing
+        if already_enrolled or (not inserted and not missing):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Already enrolled in this course"
+            )
+        
+        if missing:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Prerequisites not completed: {', '.join(missing)}"
+            )
+        
+        return MessageResponse(message="Successfully enrolled in course")
+
     except HTTPException:
         raise
     except Exception as e:
@@ -288,59 +237,85 @@ async def enroll_in_course(email: str, enrollment: EnrollInCourse):
             detail=f"Database error: {str(e)}"
         )
 
+def _my_courses_etag(catalog, enrollments):
+    """Weak validator over the enrollment rows and the catalog entries they show"""
+    digest = hashlib.md5()
+    for course_id, score, status_ in enrollments:
+        course = catalog.courses.get(course_id)
+        shown = course and (
+            course.name, course.difficulty_level, course.duration, course.course_type,
+            catalog.name("universities", course.uni_id),
+            sorted(catalog.name("instructors", i) for i in course.instructor_ids)
+        )
+        digest.update(repr((course_id, score, status_, shown)).encode())
+    return f'W/"{digest.hexdigest()}"'
+
+def _etag_matches(request, etag):
+    """If-None-Match check with weak comparison"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return "*" in tags or etag.removeprefix("W/") in tags
+
 @router.get("/my-courses/{email}", response_model=List[StudentCourseResponse])
-async def get_my_courses(email: str):
+async def get_my_courses(email: str, request: Request, response: Response, cursor: AsyncCursor = Depends(get_autocommit_db)):
     """Get all courses the student is enrolled in with scores"""
     try:
-        with get_db_cursor() as cursor:
-            # Get student ID
-            cursor.execute("SELECT Student_id FROM Student WHERE Email = %s", (email,))
-            result = cursor.fetchone()
-            if not result:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="Student not found"
-                )
-            student_id = result[0]
-            
-            # Get enrolled courses
-            cursor.execute("""
-                SELECT e.Course_id, c.Name, e.Evaluation_score, e.Status,
-                       c.Difficulty_level, c.Duration, c.Course_Type, u.Name
-                FROM Enrolled_in e
-                JOIN Course c ON e.Course_id = c.Course_id
-                JOIN University u ON c.Uni_id = u.Uni_id
-                WHERE e.Student_id = %s
-                ORDER BY e.Status, c.Name
-            """, (student_id,))
-            
-            courses = []
-            for row in cursor.fetchall():
-                course_id = row[0]
-                
-                # Get instructors
-                cursor.execute("""
-                    SELECT i.Name
-                    FROM Teaches t
-                    JOIN Instructor i ON t.Instructor_id = i.Instructor_id
-                    WHERE t.Course_id = %s
-                """, (course_id,))
-                instructors = [r[0] for r in cursor.fetchall()]
-                
-                courses.append(StudentCourseResponse(
-                    course_id=row[0],
-                    course_name=row[1],
-                    evaluation_score=row[2],
-                    status=row[3],
-                    instructor_names=instructors,
-                    difficulty_level=row[4],
-                    duration=row[5],
-                    course_type=row[6],
-                    university_name=row[7]
-                ))
-            
-            return courses
-    
+        # Student id and enrollment rows in one cheap indexed lookup
+        await execute_prepared(cursor, "student_enrollments", (email,))
+        rows = await cursor.fetchall()
+        if not rows:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Student not found"
+            )
+        student_id = rows[0][0]
+        enrollments = [row[1:] for row in rows if row[1] is not None]
+        
+        # Unchanged dashboards revalidate without a body
+        etag = _my_courses_etag(await ensure_loaded(), enrollments)
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+        if _etag_matches(request, etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        response.headers.update(headers)
+        
+        if not enrollments:
+            return []
+        
+        # Enrolled courses with their instructors aggregated per course
+        await cursor.execute("""
+            SELECT e.Course_id, c.Name, e.Evaluation_score, e.Status,
+                   c.Difficulty_level, c.Duration, c.Course_Type, u.Name,
+                   ARRAY(
+                       SELECT i.Name
+                       FROM Teaches t
+                       JOIN Instructor i ON t.Instructor_id = i.Instructor_id
+                       WHERE t.Course_id = c.Course_id
+                       ORDER BY i.Name
+                   )
+            FROM Enrolled_in e
+            JOIN Course c ON e.Course_id = c.Course_id
+            JOIN University u ON c.Uni_id = u.Uni_id
+            WHERE e.Student_id = %s
+            ORDER BY e.Status, c.Name
+        """, (student_id,))
+        
+        return [
+            StudentCourseResponse(
+                course_id=row[0],
+                course_name=row[1],
+                evaluation_score=row[2],
+                status=row[3],
+                instructor_names=row[8],
+                difficulty_level=row[4],
+                duration=row[5],
+                course_type=row[6],
+                university_name=row[7]
+            )
+            for row in await cursor.fetchall()
+        ]
+
     except HTTPException:
         raise
     except Exception as e:
@@ -0,0 +1,377 @@
+"""
+Course search.
+
+Course.Search_vector is a weighted tsvector kept current by triggers
+(see database/migrations/002_course_search.sql): the course name has weight
+A, its topic names B and its university name C. Free-text queries match it
+through a GIN index and are ranked with ts_rank; substring filters on
+course, university and topic names are served by pg_trgm indexes.
+
+Searches without free text are served by search_catalog() from the
+in-memory course catalog (app/catalog.py) instead. Both paths treat
+substring filters literally (% and _ are escaped for ILIKE) and order
+names by the database collation, so a query returns the same courses in
+the same order whichever path answers it.
+"""
+from fastapi import HTTPException, status
+from app.database import get_db_cursor
+from app.models import CourseSearch, CourseResponse, CourseFacets, FacetCount, PriceBucket
+from bisect import bisect_right
+from decimal import Decimal
+import base64
+import binascii
+import json
+
+# Text search configuration used by the triggers and by queries
+SEARCH_CONFIG = "english"
+
+# Instructors, topics and prerequisites are aggregated per course in the
+# same statement, so a search page is one round trip at any size
+COURSE_COLUMNS = """
+    c.Course_id, c.Name, c.Price, c.Duration, c.Course_Type,
+    c.Difficulty_level, c.Notes_URL, c.Video_URL,
+    u.Name as uni_name, b.Name as book_name,
+    ARRAY(
+        SELECT i.Name
+        FROM Teaches te
+        JOIN Instructor i ON te.Instructor_id = i.Instructor_id
+        WHERE te.Course_id = c.Course_id
+        ORDER BY i.Name
+    ) as instructors,
+    ARRAY(
+        SELECT t.Name
+        FROM Course_Topic ct
+        JOIN Topic t ON ct.Topic_id = t.Topic_id
+        WHERE ct.Course_id = c.Course_id
+        ORDER BY t.Name
+    ) as topics,
+    ARRAY(
+        SELECT p.Name
+        FROM Course_Prerequisites cp
+        JOIN Course p ON cp.Prerequisite_Course_id = p.Course_id
+        WHERE cp.Course_id = c.Course_id
+        ORDER BY p.Name
+    ) as prerequisites
+"""
+
+RANK = "ts_rank(c.Search_vector, query)::float8"
+
+# Lower bounds of the price facet buckets; the last bucket is open-ended
+PRICE_BUCKETS = (Decimal(0), Decimal(100), Decimal(500), Decimal(1000), Decimal(5000))
+# University and topic facets list at most this many values
+FACET_LIMIT = 20
+
+def encode_cursor(*values) -> str:
+    """Opaque keyset cursor pointing just past the given sort key"""
+    raw = json.dumps(list(values)).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+def decode_cursor(value: str, ranked: bool):
+    """Sort key from a cursor: (name, id), or (rank, name, id) for ranked searches"""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(value.encode()))
+        if ranked:
+            rank, name, course_id = values
+            if not isinstance(rank, (int, float)):
+                raise ValueError
+        else:
+            name, course_id = values
+        if not isinstance(name, str) or not isinstance(course_id, int):
+            raise ValueError
+        return values
+    except (ValueError, TypeError, binascii.Error):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid search cursor"
+        )
+
+def contains_pattern(value: str) -> str:
+    """ILIKE pattern matching value anywhere, with its wildcards taken literally"""
+    escaped = value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+def _is_ranked(search: CourseSearch):
+    return bool(search.q and search.q.strip())
+
+def _filtered_courses(search: CourseSearch):
+    """FROM/WHERE clause matching every result (ignoring paging) and its parameters"""
+    ranked = _is_ranked(search)
+    params = []
+
+    query = """
+        FROM Course c
+        JOIN University u ON c.Uni_id = u.Uni_id
+        JOIN Book b ON c.Book_id = b.Book_id
+    """
+    if ranked:
+        query += f" CROSS JOIN websearch_to_tsquery('{SEARCH_CONFIG}', %s) query"
+        params.append(search.q)
+    query += " WHERE 1=1"
+
+    if ranked:
+        # Whole words through the tsvector, partial words through the
+        # trigram index on the course name
+        query += " AND (c.Search_vector @@ query OR c.Name ILIKE %s)"
+        params.append(contains_pattern(search.q.strip()))
+
+    if search.name:
+        query += " AND c.Name ILIKE %s"
+        params.append(contains_pattern(search.name))
+
+    if search.course_type:
+        query += " AND c.Course_Type = %s"
+        params.append(search.course_type)
+
+    if search.difficulty_level:
+        query += " AND c.Difficulty_level = %s"
+        params.append(search.difficulty_level)
+
+    if search.min_price is not None:
+        query += " AND c.Price >= %s"
+        params.append(search.min_price)
+
+    if search.max_price is not None:
+        query += " AND c.Price <= %s"
+        params.append(search.max_price)
+
+    if search.university_name:
+        query += " AND u.Name ILIKE %s"
+        params.append(contains_pattern(search.university_name))
+
+    if search.topic_name:
+        # EXISTS instead of joining topics keeps one row per course, no DISTINCT
+        query += """ AND EXISTS (
+            SELECT 1
+            FROM Course_Topic ct
+            JOIN Topic t ON ct.Topic_id = t.Topic_id
+            WHERE ct.Course_id = c.Course_id AND t.Name ILIKE %s
+        )"""
+        params.append(contains_pattern(search.topic_name))
+
+    return query, params
+
+def build_search_query(search: CourseSearch, paged=True):
+    """SQL and parameters for one page of search results (limit + 1 rows).
+
+    With paged=False the query returns every match after the cursor.
+    """
+    ranked = _is_ranked(search)
+    from_where, params = _filtered_courses(search)
+
+    query = f"SELECT {COURSE_COLUMNS}"
+    if ranked:
+        query += f", {RANK} as rank"
+    query += from_where
+
+    # Keyset pagination: seek past the last row of the previous page, so
+    # deep pages cost the same as the first
+    if search.cursor:
+        key = decode_cursor(search.cursor, ranked)
+        if ranked:
+            query += f" AND ({RANK} < %s OR ({RANK} = %s AND (c.Name, c.Course_id) > (%s, %s)))"
+            params.extend([key[0], key[0], key[1], key[2]])
+        else:
+            query += " AND (c.Name, c.Course_id) > (%s, %s)"
+            params.extend(key)
+
+    if ranked:
+        query += " ORDER BY rank DESC, c.Name, c.Course_id"
+    else:
+        query += " ORDER BY c.Name, c.Course_id"
+    if paged:
+        # One extra row tells us whether there is another page
+        query += " LIMIT %s"
+        params.append(search.limit + 1)
+
+    return query, params
+
+def row_to_course(row) -> CourseResponse:
+    return CourseResponse(
+        course_id=row[0],
+        course_name=row[1],
+        price=row[2],
+        duration=row[3],
+        course_type=row[4],
+        difficulty_level=row[5],
+        notes_url=row[6],
+        video_url=row[7],
+        university_name=row[8],
+        book_name=row[9],
+        instructors=row[10],
+        topics=row[11],
+        prerequisites=row[12]
+    )
+
+def next_page_cursor(search: CourseSearch, rows):
+    """Cursor for the page after rows, or None when rows is the last page"""
+    if len(rows) <= search.limit:
+        return None
+    last = rows[search.limit - 1]
+    if _is_ranked(search):
+        return encode_cursor(last[13], last[1], last[0])
+    return encode_cursor(last[1], last[0])
+
+class FacetCounter:
+    """Accumulates facet counts over every course matching a search"""
+
+    def __init__(self):
+        self.counts = {"course_type": {}, "difficulty_level": {}, "university": {}, "topic": {}}
+        self.price = [0] * len(PRICE_BUCKETS)
+
+    def add(self, facet, value, count=1):
+        values = self.counts[facet]
+        values[value] = values.get(value, 0) + count
+
+    def add_price(self, price):
+        self.price[bisect_right(PRICE_BUCKETS, price) - 1] += 1
+
+    def _top(self, facet, limit=None):
+        # NULL course types and difficulty levels sort after every value
+        ranked = sorted(
+            self.counts[facet].items(),
+            key=lambda item: (-item[1], item[0] is None, item[0] or "")
+        )
+        return [FacetCount(value=v, count=n) for v, n in ranked[:limit]]
+
+    def result(self) -> CourseFacets:
+        bounds = PRICE_BUCKETS + (None,)
+        return CourseFacets(
+            course_type=self._top("course_type"),
+            difficulty_level=self._top("difficulty_level"),
+            university=self._top("university", FACET_LIMIT),
+            topic=self._top("topic", FACET_LIMIT),
+            price=[
+                PriceBucket(min_price=bounds[i], max_price=bounds[i + 1], count=n)
+                for i, n in enumerate(self.price)
+            ],
+        )
+
+def build_facet_query(search: CourseSearch):
+    """SQL returning (facet, value, count) rows over every match of search"""
+    from_where, params = _filtered_courses(search)
+    edges = ", ".join(str(p) for p in PRICE_BUCKETS[1:])
+    query = f"""
+        WITH matches AS (
+            SELECT c.Course_id, c.Course_Type, c.Difficulty_level, c.Price, u.Name AS uni_name
+            {from_where}
+        )
+        SELECT 'course_type', Course_Type, COUNT(*) FROM matches GROUP BY Course_Type
+        UNION ALL
+        SELECT 'difficulty_level', Difficulty_level, COUNT(*) FROM matches GROUP BY Difficulty_level
+        UNION ALL
+        SELECT 'university', uni_name, COUNT(*) FROM matches GROUP BY uni_name
+        UNION ALL
+        SELECT 'topic', t.Name, COUNT(*)
+        FROM matches m
+        JOIN Course_Topic ct ON ct.Course_id = m.Course_id
+        JOIN Topic t ON ct.Topic_id = t.Topic_id
+        GROUP BY t.Name
+        UNION ALL
+        SELECT 'price', width_bucket(Price, ARRAY[{edges}]::numeric[])::text, COUNT(*)
+        FROM matches GROUP BY 2
+    """
+    return query, params
+
+def facets_from_rows(rows) -> CourseFacets:
+    counter = FacetCounter()
+    for facet, value, count in rows:
+        if facet == "price":
+            counter.price[int(value)] += count
+        else:
+            counter.add(facet, value, count)
+    return counter.result()
+
+def _matches(catalog, course, search: CourseSearch, needles):
+    if needles["name"] and needles["name"] not in course.name_lower:
+        return False
+    if search.course_type and course.course_type != search.course_type:
+        return False
+    if search.difficulty_level and course.difficulty_level != search.difficulty_level:
+        return False
+    if search.min_price is not None and course.price < search.min_price:
+        return False
+    if search.max_price is not None and course.price > search.max_price:
+        return False
+    if needles["university"] and needles["university"] not in catalog.name("universities", course.uni_id).lower():
+        return False
+    if needles["topic"] and not any(
+        needles["topic"] in catalog.name("topics", t).lower() for t in course.topic_ids
+    ):
+        return False
+    return True
+
+def _needles(search: CourseSearch):
+    """Lower-cased substring filters"""
+    return {
+        "name": (search.name or "").lower(),
+        "university": (search.university_name or "").lower(),
+        "topic": (search.topic_name or "").lower(),
+    }
+
+async def catalog_start(catalog, search: CourseSearch):
+    """Index in catalog.order where the page after search.cursor begins.
+
+    A cursor normally names a course still in the snapshot. If that course
+    was renamed or deleted since, the database places the key under its
+    collation: the page resumes at the next course it orders after it.
+    """
+    after = decode_cursor(search.cursor, ranked=False) if search.cursor else None
+    start = catalog.start_index(after)
+    if start is not None:
+        return start
+    async with get_db_cursor(readonly=True) as cursor:
+        await cursor.execute(
+            "SELECT Course_id FROM Course WHERE (Name, Course_id) > (%s, %s) "
+            "ORDER BY Name, Course_id LIMIT %s",
+            (after[0], after[1], search.limit + 1)
+        )
+        following = [row[0] for row in await cursor.fetchall()]
+    # Courses newer than the snapshot are skipped like any other unknown id
+    positions = [catalog.position[i] for i in following if i in catalog.position]
+    return positions[0] if positions else len(catalog.order)
+
+def iter_catalog_matches(catalog, search: CourseSearch, start):
+    """Every catalog course matching search from position start, in name order"""
+    needles = _needles(search)
+    # Copy the ordering now: the catalog may be patched while a stream is consumed
+    keys = catalog.order[start:]
+    courses = (catalog.courses.get(course_id) for course_id in keys)
+    return (c for c in courses if c is not None and _matches(catalog, c, search, needles))
+
+def search_catalog(catalog, search: CourseSearch, start):
+    """One page of filtered courses from the in-memory catalog.
+
+    start is the cursor's position from catalog_start(). Returns (courses,
+    next_cursor, facets). With include_facets the whole catalog is scanned
+    once, counting facets over every match while the page is collected;
+    otherwise the scan starts at the cursor and stops as soon as the page
+    is full.
+    """
+    needles = _needles(search)
+    counter = FacetCounter() if search.include_facets else None
+
+    page = []
+    has_more = False
+    for index in range(0 if counter else start, len(catalog.order)):
+        course = catalog.courses[catalog.order[index]]
+        if not _matches(catalog, course, search, needles):
+            continue
+        if counter:
+            counter.add("course_type", course.course_type)
+            counter.add("difficulty_level", course.difficulty_level)
+            counter.add("university", catalog.name("universities", course.uni_id))
+            for topic_id in course.topic_ids:
+                counter.add("topic", catalog.name("topics", topic_id))
+            counter.add_price(course.price)
+        if index < start:
+            continue
+        if len(page) == search.limit:
+            has_more = True
+            if not counter:
+                break
+        else:
+            page.append(course)
+
+    next_cursor = encode_cursor(page[-1].name, page[-1].course_id) if has_more else None
+    facets = counter.result() if counter else None
+    return [catalog.to_response(c) for c in page], next_cursor, facets
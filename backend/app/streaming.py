@@ -0,0 +1,196 @@
+"""
+Streaming request and response bodies for large lists.
+
+Responses: clients of the list endpoints opt in to NDJSON with
+`Accept: application/x-ndjson` and get one JSON object per line; CSV
+exports always stream. Rows are read through a server-side (named) cursor
+in batches of STREAM_BATCH_SIZE and written out as they arrive, so memory
+stays flat whatever the result size and the first line leaves before the
+last row is fetched.
+
+A stream checks out a connection of its own, runs its query and fetches
+the first batch before the response is returned, so a saturated pool or
+a failing query still answers with a proper error status. The request's
+own connection (from a get_db-style dependency) is committed and given
+back first, so a request never holds two connections at once. The
+connection goes back when the last batch is sent or the client goes
+away; errors on later batches can only cut the body short.
+
+Requests: csv_records() decodes an uploaded CSV body chunk by chunk,
+keeping newlines inside quoted fields.
+"""
+from contextlib import AsyncExitStack, aclosing
+from fastapi import HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from app.database import get_db_connection, release_request_connection
+import codecs
+import csv
+import io
+import json
+import os
+import sys
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+CSV_MEDIA_TYPE = "text/csv"
+STREAM_BATCH_SIZE = int(os.getenv("STREAM_BATCH_SIZE", "500"))  # rows fetched per round trip
+
+def wants_ndjson(request) -> bool:
+    """True when the client asked for NDJSON in its Accept header"""
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+def _line(item) -> bytes:
+    return (json.dumps(jsonable_encoder(item)) + "\n").encode()
+
+class _QueryStream:
+    """Named cursor over a query, opened and first batch fetched up front.
+
+    Opening before the StreamingResponse is built lets a pool timeout or a
+    failing query still become an ordinary error response (503 with
+    Retry-After for a busy pool); once the body has started, the status
+    line is gone. close() is idempotent and runs both when the last batch
+    is sent and as the response's background task, which Starlette also
+    runs when the client disconnects before the body is iterated.
+    """
+
+    def __init__(self):
+        self._stack = AsyncExitStack()
+        self._cursor = None
+        self._first = []
+
+    async def open(self, query, params, readonly):
+        # Never hold two connections: the endpoint is done with its own
+        await release_request_connection()
+        try:
+            conn = await self._stack.enter_async_context(get_db_connection(readonly=readonly))
+            # Named cursors live inside a transaction; read-only connections
+            # run in autocommit, so open one explicitly
+            await self._stack.enter_async_context(conn.transaction())
+            self._cursor = await self._stack.enter_async_context(conn.cursor(name="stream"))
+            await self._cursor.execute(query, params)
+            self._first = await self._cursor.fetchmany(STREAM_BATCH_SIZE)
+        except BaseException:
+            await self._stack.__aexit__(*sys.exc_info())
+            self._stack = None
+            raise
+        return self
+
+    async def batches(self):
+        try:
+            rows = self._first
+            while rows:
+                yield rows
+                rows = await self._cursor.fetchmany(STREAM_BATCH_SIZE)
+        finally:
+            await self.close()
+
+    async def close(self):
+        stack, self._stack = self._stack, None
+        if stack is not None:
+            await stack.aclose()
+
+async def _stream_query(batches, to_item):
+    # aclosing returns the connection as soon as the client disconnects,
+    # not whenever the abandoned generator is garbage collected
+    async with aclosing(batches) as batches:
+        async for rows in batches:
+            yield b"".join(_line(to_item(row)) for row in rows)
+
+async def _stream_csv(batches, header):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    async with aclosing(batches) as batches:
+        async for rows in batches:
+            writer.writerows(rows)
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()  # header of an empty export
+
+async def _stream_items(items):
+    batch = []
+    for item in items:
+        batch.append(_line(item))
+        if len(batch) == STREAM_BATCH_SIZE:
+            yield b"".join(batch)
+            batch = []
+    if batch:
+        yield b"".join(batch)
+
+async def ndjson_query_response(query, params, to_item, readonly=True):
+    """Stream the rows of query, each mapped through to_item, as NDJSON"""
+    stream = await _QueryStream().open(query, params, readonly)
+    return StreamingResponse(
+        _stream_query(stream.batches(), to_item),
+        media_type=NDJSON_MEDIA_TYPE,
+        background=BackgroundTask(stream.close)
+    )
+
+def ndjson_items_response(items):
+    """Stream an iterable of already available items, e.g. from the catalog"""
+    return StreamingResponse(_stream_items(items), media_type=NDJSON_MEDIA_TYPE)
+
+async def csv_query_response(query, params, header, filename, readonly=True):
+    """Stream the rows of query as a CSV download with the given header row"""
+    stream = await _QueryStream().open(query, params, readonly)
+    return StreamingResponse(
+        _stream_csv(stream.batches(), header),
+        media_type=CSV_MEDIA_TYPE,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+        background=BackgroundTask(stream.close)
+    )
+
+class _CsvRecordSplitter:
+    """Cuts decoded text into whole CSV records as it arrives.
+
+    Lines are only handed to csv.reader once every quote they open is
+    closed, so a quoted field keeps its embedded newlines (csv.writer
+    emits those for multi-line values), as reading with newline='' would.
+    """
+
+    def __init__(self):
+        self.pending = ""  # text after the last newline
+        self.lines = []  # lines of a record whose quoted field is still open
+        self.quotes = 0
+
+    def feed(self, text, final=False):
+        """Complete, non-empty records in text; final flushes whatever is left"""
+        self.pending += text
+        lines = self.pending.split("\n")
+        self.pending = "" if final else lines.pop()
+        records = []
+        for line in lines:
+            self.lines.append(line + "\n")
+            # Escaped quotes are doubled, so an odd count means a field is open
+            self.quotes += line.count('"')
+            if self.quotes % 2 == 0:
+                records.extend(self._flush())
+        if final:
+            records.extend(self._flush())  # an unterminated quote ends with the body
+        return records
+
+    def _flush(self):
+        records = [record for record in csv.reader(self.lines) if record]
+        self.lines = []
+        self.quotes = 0
+        return records
+
+async def csv_records(request):
+    """Non-empty CSV records of the request body, decoded chunk by chunk"""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    splitter = _CsvRecordSplitter()
+    try:
+        async for chunk in request.stream():
+            for record in splitter.feed(decoder.decode(chunk)):
+                yield record
+        tail = decoder.decode(b"", final=True)
+    except UnicodeDecodeError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="CSV upload must be UTF-8 encoded"
+        )
+    for record in splitter.feed(tail, final=True):
+        yield record
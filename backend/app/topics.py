@@ -0,0 +1,93 @@
+"""
+Topic resolution.
+
+Topic names are matched case-insensitively. resolve_topic_ids() maps any
+number of names to Topic_ids in at most one statement: names already in
+this worker's cache cost nothing, and the rest are upserted together
+against the unique index on lower(Name). Concurrent requests can no
+longer create the same topic twice.
+
+Only topics that were already committed are cached. A topic created by
+the current request is not, because that transaction may still roll back.
+"""
+from app.catalog import add_change_listener
+
+# lower(Name) -> Topic_id
+_topic_ids = {}
+_stats = {"hits": 0, "misses": 0}
+
+# Existing topics come from the join; topics this statement creates come
+# from the insert (the join's snapshot cannot see them)
+UPSERT_TOPICS = """
+    WITH input AS (
+        SELECT DISTINCT ON (lower(n)) n AS Name
+        FROM unnest(%s::varchar[]) AS n
+    ),
+    inserted AS (
+        INSERT INTO Topic (Name)
+        SELECT Name FROM input
+        ON CONFLICT ((lower(Name))) DO NOTHING
+        RETURNING Topic_id, Name
+    )
+    SELECT i.Name, t.Topic_id, false
+    FROM Topic t
+    JOIN input i ON lower(t.Name) = lower(i.Name)
+    UNION ALL
+    SELECT Name, Topic_id, true FROM inserted
+"""
+
+# Topics committed by a concurrent request after the upsert's snapshot
+# was taken: the insert skipped them and the join could not see them
+LOOKUP_TOPICS = """
+    SELECT n, t.Topic_id
+    FROM unnest(%s::varchar[]) AS n
+    JOIN Topic t ON lower(t.Name) = lower(n)
+"""
+
+async def resolve_topic_ids(cursor, names):
+    """Topic_ids for names, in order and without duplicates, creating missing topics"""
+    keys = list(dict.fromkeys(name.lower() for name in names))
+    missing = [key for key in keys if key not in _topic_ids]
+    _stats["hits"] += len(keys) - len(missing)
+    _stats["misses"] += len(missing)
+
+    resolved = {key: _topic_ids[key] for key in keys if key in _topic_ids}
+    if missing:
+        # Insert with the first spelling a caller used for each name
+        spelling = {}
+        for name in names:
+            spelling.setdefault(name.lower(), name)
+        # Rows come back keyed by the name as sent, so Python's lower()
+        # is the only normalization the cache has to agree with
+        await cursor.execute(UPSERT_TOPICS, ([spelling[key] for key in missing],))
+        for name, topic_id, created in await cursor.fetchall():
+            resolved[name.lower()] = topic_id
+            if not created:
+                _topic_ids[name.lower()] = topic_id
+
+        raced = [spelling[key] for key in missing if key not in resolved]
+        if raced:
+            await cursor.execute(LOOKUP_TOPICS, (raced,))
+            for name, topic_id in await cursor.fetchall():
+                resolved[name.lower()] = topic_id
+                _topic_ids[name.lower()] = topic_id
+
+    return [resolved[key] for key in keys]
+
+async def link_course_topics(cursor, course_id, topic_ids):
+    """Attach topics to a course in one statement, skipping existing links"""
+    await cursor.execute("""
+        INSERT INTO Course_Topic (Course_id, Topic_id)
+        SELECT %s, unnest(%s::int[])
+        ON CONFLICT DO NOTHING
+    """, (course_id, list(topic_ids)))
+
+def get_topic_cache_stats():
+    return {"cached": len(_topic_ids), **_stats}
+
+def _on_catalog_change(course_ids):
+    # Full reloads also follow out-of-band edits such as merging duplicate topics
+    if course_ids is None:
+        _topic_ids.clear()
+
+add_change_listener(_on_catalog_change)
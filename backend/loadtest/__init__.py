@@ -0,0 +1,8 @@
+"""
+Load-test and benchmark tooling for the backend.
+
+fixture   - create a scratch database and load database/schema.sql
+generate  - fill every table with synthetic data at a chosen scale
+driver    - replay frontend page-load mixes against a running server
+compare   - diff two driver result files
+"""
@@ -0,0 +1,43 @@
+"""
+Compare two load-test result files endpoint by endpoint.
+
+    python -m loadtest.compare results/before.json results/after.json
+"""
+import argparse
+import json
+from pathlib import Path
+
+METRICS = ("p50_ms", "p95_ms", "p99_ms", "throughput_rps", "queries_avg")
+
+def _change(before, after):
+    if before in (None, 0) or after is None:
+        return ""
+    return f"{(after - before) / before * 100:+.0f}%"
+
+def compare(before, after):
+    rows = []
+    for endpoint in sorted(set(before["endpoints"]) | set(after["endpoints"])):
+        b = before["endpoints"].get(endpoint, {})
+        a = after["endpoints"].get(endpoint, {})
+        rows.append((endpoint, [(m, b.get(m), a.get(m)) for m in METRICS]))
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("before")
+    parser.add_argument("after")
+    args = parser.parse_args()
+
+    before = json.loads(Path(args.before).read_text())
+    after = json.loads(Path(args.after).read_text())
+    print(f"{before.get('revision')} -> {after.get('revision')}")
+    print(f"throughput: {before['throughput_rps']} -> {after['throughput_rps']} req/s "
+          f"{_change(before['throughput_rps'], after['throughput_rps'])}")
+
+    for endpoint, metrics in compare(before, after):
+        print(endpoint)
+        for name, b, a in metrics:
+            print(f"    {name:<15} {str(b):>10} -> {str(a):<10} {_change(b, a)}")
+
+if __name__ == "__main__":
+    main()
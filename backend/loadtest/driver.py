@@ -0,0 +1,266 @@
+"""
+Replay realistic frontend page loads against a running backend.
+
+    python -m loadtest.driver --base-url http://127.0.0.1:8000 --users 50 --duration 60
+
+Each virtual user repeatedly picks a scenario (by weight) and issues its
+requests the way the page does, concurrently where the page uses
+Promise.all. Per-endpoint latency percentiles, throughput, and the SQL
+statement counts reported in X-DB-Query-Count are written as JSON so runs
+can be compared across commits with loadtest.compare.
+"""
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+import httpx
+
+RESULTS_DIR = Path(__file__).with_name("results")
+
+class Recorder:
+    """Latency samples and query counts keyed by endpoint template"""
+
+    def __init__(self):
+        self.samples = {}
+
+    def add(self, endpoint, seconds, status_code, query_count):
+        entry = self.samples.setdefault(endpoint, {"latency": [], "statuses": {}, "queries": []})
+        entry["latency"].append(seconds)
+        entry["statuses"][status_code] = entry["statuses"].get(status_code, 0) + 1
+        if query_count is not None:
+            entry["queries"].append(query_count)
+
+    def summary(self, elapsed):
+        endpoints = {}
+        for endpoint, entry in sorted(self.samples.items()):
+            latency = sorted(entry["latency"])
+            queries = entry["queries"]
+            errors = sum(n for code, n in entry["statuses"].items() if code == 0 or code >= 500)
+            endpoints[endpoint] = {
+                "requests": len(latency),
+                "throughput_rps": round(len(latency) / elapsed, 2),
+                "errors": errors,
+                "statuses": {str(code): n for code, n in sorted(entry["statuses"].items())},
+                "p50_ms": percentile(latency, 50),
+                "p95_ms": percentile(latency, 95),
+                "p99_ms": percentile(latency, 99),
+                "max_ms": round(latency[-1] * 1000, 2),
+                "queries_avg": round(sum(queries) / len(queries), 2) if queries else None,
+                "queries_max": max(queries) if queries else None,
+            }
+        total = sum(e["requests"] for e in endpoints.values())
+        return {
+            "requests": total,
+            "throughput_rps": round(total / elapsed, 2),
+            "errors": sum(e["errors"] for e in endpoints.values()),
+            "endpoints": endpoints,
+        }
+
+def percentile(sorted_samples, pct):
+    """Nearest-rank percentile in milliseconds"""
+    if not sorted_samples:
+        return None
+    rank = max(0, min(len(sorted_samples) - 1, round(pct / 100 * len(sorted_samples)) - 1))
+    return round(sorted_samples[rank] * 1000, 2)
+
+class VirtualUser:
+    def __init__(self, client, recorder, manifest, rng):
+        self.client = client
+        self.recorder = recorder
+        self.counts = manifest["counts"]
+        self.domain = manifest["email_domain"]
+        self.rng = rng
+
+    def _email(self, role):
+        return f"{role}{self.rng.randint(1, self.counts[role + 's'])}@{self.domain}"
+
+    async def request(self, method, endpoint, url, **kwargs):
+        """Issue one request; endpoint is the route template used as the stats key"""
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+            status_code = response.status_code
+            query_count = response.headers.get("X-DB-Query-Count")
+        except httpx.HTTPError:
+            status_code, query_count = 0, None
+            response = None
+        self.recorder.add(
+            f"{method} {endpoint}", time.perf_counter() - start, status_code,
+            int(query_count) if query_count is not None else None
+        )
+        return response
+
+    def get(self, endpoint, url=None, **kwargs):
+        return self.request("GET", endpoint, url or endpoint, **kwargs)
+
+    def post(self, endpoint, url=None, **kwargs):
+        return self.request("POST", endpoint, url or endpoint, **kwargs)
+
+    # ---------- scenarios ----------
+
+    async def analyst_dashboard(self):
+        """analyst/page.tsx boot(): eight requests in one Promise.all"""
+        await asyncio.gather(
+            self.get("/analyst/universities"),
+            self.get("/analyst/instructors"),
+            self.get("/analyst/statistics/courses-list"),
+            self.get("/analyst/statistics/students"),
+            self.get("/analyst/statistics/topics"),
+            self.get("/analyst/statistics/completion-rates"),
+            self.get("/analyst/statistics/universities"),
+            self.get("/analyst/statistics/instructors"),
+        )
+
+    async def analyst_filter(self):
+        """analyst/page.tsx handleFilter(): three requests in one Promise.all"""
+        uni = self.rng.randint(1, self.counts["universities"])
+        await asyncio.gather(
+            self.post("/analyst/statistics/courses", json={"university_id": uni}),
+            self.get("/analyst/statistics/enrollment-by-difficulty", params={"university_id": uni}),
+            self.get("/analyst/statistics/enrollment-by-type", params={"university_id": uni}),
+        )
+
+    async def admin_dashboard(self):
+        """admin/page.tsx loadDropdownData()"""
+        await asyncio.gather(
+            self.get("/admin/universities"),
+            self.get("/admin/books"),
+            self.get("/admin/instructors"),
+            self.get("/admin/courses"),
+        )
+
+    async def instructor_dashboard(self):
+        """instructor/page.tsx initial load, then one course roster"""
+        email = self._email("instructor")
+        courses, *_ = await asyncio.gather(
+            self.get("/instructor/my-courses/{email}", f"/instructor/my-courses/{email}"),
+            self.get("/instructor/books"),
+            self.get("/instructor/topics"),
+            self.get("/instructor/profile/{email}", f"/instructor/profile/{email}"),
+        )
+        if courses is not None and courses.status_code == 200 and courses.json():
+            course_id = self.rng.choice(courses.json())["course_id"]
+            await self.get(
+                "/instructor/course/{course_id}/students",
+                f"/instructor/course/{course_id}/students", params={"email": email}
+            )
+
+    async def student_search_enroll(self):
+        """student/page.tsx: load my courses, search, enroll, reload my courses"""
+        email = self._email("student")
+        await self.get("/student/my-courses/{email}", f"/student/my-courses/{email}")
+        filters = self.rng.choice([
+            {},
+            {"difficulty_level": self.rng.choice(["Beginner", "Intermediate", "Advanced"])},
+            {"course_type": self.rng.choice(["Diploma", "Degree", "Certificate"])},
+            {"max_price": self.rng.randint(100, 5000)},
+            {"q": self.rng.choice(["data", "machine learning", "security", "finance systems"])},
+        ])
+        results = await self.post("/student/search-courses", json=filters)
+        course_id = self.rng.randint(1, self.counts["courses"])
+        if results is not None and results.status_code == 200:
+            body = results.json()
+            courses = body if isinstance(body, list) else body.get("courses", [])
+            if courses:
+                course_id = self.rng.choice(courses)["course_id"]
+        await self.post("/student/enroll", params={"email": email}, json={"course_id": course_id})
+        await self.get("/student/my-courses/{email}", f"/student/my-courses/{email}")
+
+SCENARIOS = {
+    "student_search_enroll": 5,
+    "analyst_dashboard": 2,
+    "analyst_filter": 2,
+    "instructor_dashboard": 2,
+    "admin_dashboard": 1,
+}
+
+def parse_mix(value):
+    """'student_search_enroll=5,analyst_dashboard=1' -> weights"""
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f"unknown scenario {name!r}")
+        mix[name] = float(weight or 1)
+    return mix
+
+async def run(base_url, users, duration, mix, manifest, seed, timeout):
+    recorder = Recorder()
+    deadline = time.monotonic() + duration
+    limits = httpx.Limits(max_connections=users * 8, max_keepalive_connections=users * 8)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+        async def user_loop(n):
+            user = VirtualUser(client, recorder, manifest, random.Random(seed + n))
+            names, weights = list(mix), list(mix.values())
+            while time.monotonic() < deadline:
+                scenario = user.rng.choices(names, weights)[0]
+                await getattr(user, scenario)()
+
+        started = time.monotonic()
+        await asyncio.gather(*(user_loop(n) for n in range(users)))
+        elapsed = time.monotonic() - started
+
+    return recorder.summary(elapsed), elapsed
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=Path(__file__).parent, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--users", type=int, default=20, help="concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=30, help="seconds")
+    parser.add_argument("--mix", type=parse_mix, default=dict(SCENARIOS),
+                        help="scenario weights, e.g. student_search_enroll=5,analyst_dashboard=1")
+    parser.add_argument("--manifest", default=str(Path(__file__).with_name("manifest.json")),
+                        help="written by loadtest.generate")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--output", help="defaults to loadtest/results/<timestamp>-<revision>.json")
+    args = parser.parse_args()
+
+    manifest = json.loads(Path(args.manifest).read_text())
+    summary, elapsed = asyncio.run(run(
+        args.base_url, args.users, args.duration, args.mix, manifest, args.seed, args.timeout
+    ))
+
+    revision = git_revision()
+    now = datetime.now(timezone.utc)
+    result = {
+        "revision": revision,
+        "timestamp": now.isoformat(),
+        "config": {
+            "base_url": args.base_url,
+            "users": args.users,
+            "duration": round(elapsed, 2),
+            "mix": args.mix,
+            "seed": args.seed,
+            "dataset": manifest["counts"],
+        },
+        **summary,
+    }
+
+    output = Path(args.output) if args.output else RESULTS_DIR / f"{now:%Y%m%dT%H%M%S}-{revision or 'unknown'}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(result, indent=2))
+
+    print(f"{summary['requests']} requests in {elapsed:.1f}s ({summary['throughput_rps']} req/s), {summary['errors']} errors")
+    print(f"{'endpoint':<55} {'n':>6} {'p50':>8} {'p95':>8} {'p99':>8} {'queries':>8}")
+    for endpoint, stats in summary["endpoints"].items():
+        print(f"{endpoint:<55} {stats['requests']:>6} {stats['p50_ms']:>8} {stats['p95_ms']:>8} "
+              f"{stats['p99_ms']:>8} {stats['queries_avg'] if stats['queries_avg'] is not None else '-':>8}")
+    print(f"Saved {output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""
+Fill every table in database/schema.sql with synthetic data.
+
+    python -m loadtest.generate --dsn ... --scale 100k
+
+The scale names the number of enrollments; the other tables are sized
+relative to it. Data is deterministic for a given --seed, and a manifest
+describing the generated accounts is written for the load driver.
+"""
+import argparse
+import json
+import os
+import random
+import time
+from datetime import date, timedelta
+from pathlib import Path
+import psycopg
+
+SCALES = {"1k": 1_000, "10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+
+PASSWORD = "loadtest-password"
+EMAIL_DOMAIN = "load.test"
+
+COUNTRIES = ["India", "USA", "UK", "Germany", "Japan", "Canada", "Brazil", "Australia"]
+SKILL_LEVELS = ["Beginner", "Intermediate", "Advanced"]
+COURSE_TYPES = ["Diploma", "Degree", "Certificate"]
+WORDS = [
+    "Data", "Systems", "Machine", "Learning", "Networks", "Design", "Algorithms",
+    "Databases", "Cloud", "Security", "Statistics", "Compilers", "Graphics",
+    "Robotics", "Economics", "Finance", "Biology", "Physics", "Chemistry", "Writing",
+]
+
+def sizes(enrollments):
+    """Row counts for every entity at a given number of enrollments"""
+    courses = max(20, enrollments // 200)
+    return {
+        "enrollments": enrollments,
+        "students": max(50, enrollments // 5),
+        "courses": courses,
+        "instructors": max(5, courses // 4),
+        "universities": max(5, min(500, courses // 10)),
+        "books": max(10, courses // 2),
+        "topics": max(20, min(2000, courses // 2)),
+        "analysts": 5,
+        "admins": 2,
+    }
+
+def email(role, i):
+    return f"{role}{i}@{EMAIL_DOMAIN}"
+
+def _copy(cursor, table, columns, rows):
+    with cursor.copy(f"COPY {table} ({', '.join(columns)}) FROM STDIN") as copy:
+        for row in rows:
+            copy.write_row(row)
+
+def _sync_sequence(cursor, table, column):
+    cursor.execute(
+        f"SELECT setval(pg_get_serial_sequence('{table.lower()}', '{column.lower()}'), "
+        f"COALESCE((SELECT MAX({column}) FROM {table}), 1))"
+    )
+
+def generate(dsn, enrollments, seed=42):
+    rng = random.Random(seed)
+    n = sizes(enrollments)
+    started = time.monotonic()
+
+    with psycopg.connect(dsn) as conn, conn.cursor() as cursor:
+        for table in ("Enrolled_in", "Teaches", "Course_Prerequisites", "Course_Topic",
+                      "Course", "Book_Author", "Book", "Topic", "University",
+                      "Instructor_Expertise", "Student", "Instructor",
+                      "Data_Analyst", "Administrator", "Users"):
+            cursor.execute(f"TRUNCATE {table} CASCADE")
+
+        _copy(cursor, "University", ["Uni_id", "Name", "Country"], (
+            (i, f"University {i}", rng.choice(COUNTRIES)) for i in range(1, n["universities"] + 1)
+        ))
+        _copy(cursor, "Topic", ["Topic_id", "Name"], (
+            (i, f"{rng.choice(WORDS)} {i}") for i in range(1, n["topics"] + 1)
+        ))
+        _copy(cursor, "Book", ["Book_id", "Name", "ISBN"], (
+            (i, f"{rng.choice(WORDS)} Handbook {i}", f"978{i:010d}") for i in range(1, n["books"] + 1)
+        ))
+        _copy(cursor, "Book_Author", ["Book_id", "Author"], (
+            (i, f"Author {a}") for i in range(1, n["books"] + 1)
+            for a in rng.sample(range(1, 1000), rng.randint(1, 3))
+        ))
+
+        _copy(cursor, "Users", ["Email_id", "Category", "Password"], (
+            (email(role, i), category, PASSWORD)
+            for role, category, count in (
+                ("student", "Student", n["students"]),
+                ("instructor", "Instructor", n["instructors"]),
+                ("analyst", "Data Analyst", n["analysts"]),
+                ("admin", "Admin", n["admins"]),
+            )
+            for i in range(1, count + 1)
+        ))
+        _copy(cursor, "Student", ["Student_id", "Name", "Email", "DOB", "Country", "Skill_level"], (
+            (i, f"Student {i}", email("student", i),
+             date(1980, 1, 1) + timedelta(days=rng.randint(0, 9000)),
+             rng.choice(COUNTRIES), rng.choice(SKILL_LEVELS))
+            for i in range(1, n["students"] + 1)
+        ))
+        _copy(cursor, "Instructor", ["Instructor_id", "Name", "Email"], (
+            (i, f"Instructor {i}", email("instructor", i)) for i in range(1, n["instructors"] + 1)
+        ))
+        _copy(cursor, "Instructor_Expertise", ["Instructor_id", "Expertise_area"], (
+            (i, area) for i in range(1, n["instructors"] + 1)
+            for area in rng.sample(WORDS, rng.randint(1, 3))
+        ))
+        _copy(cursor, "Data_Analyst", ["Email_id", "Name"], (
+            (email("analyst", i), f"Analyst {i}") for i in range(1, n["analysts"] + 1)
+        ))
+        _copy(cursor, "Administrator", ["Email_id", "Name"], (
+            (email("admin", i), f"Admin {i}") for i in range(1, n["admins"] + 1)
+        ))
+
+        _copy(cursor, "Course", [
+            "Course_id", "Name", "Price", "Duration", "Course_Type", "Difficulty_level",
+            "Notes_URL", "Video_URL", "Book_id", "Uni_id"
+        ], (
+            (i, f"{rng.choice(WORDS)} {rng.choice(WORDS)} {i}",
+             rng.randint(0, 500) * 10, rng.randint(1, 24),
+             rng.choice(COURSE_TYPES), rng.choice(SKILL_LEVELS),
+             f"https://notes.{EMAIL_DOMAIN}/{i}" if rng.random() < 0.5 else None,
+             f"https://video.{EMAIL_DOMAIN}/{i}" if rng.random() < 0.5 else None,
+             rng.randint(1, n["books"]), rng.randint(1, n["universities"]))
+            for i in range(1, n["courses"] + 1)
+        ))
+        _copy(cursor, "Course_Topic", ["Course_id", "Topic_id"], (
+            (i, t) for i in range(1, n["courses"] + 1)
+            for t in rng.sample(range(1, n["topics"] + 1), rng.randint(1, 4))
+        ))
+        # Prerequisites only point at lower ids, so the graph stays acyclic
+        _copy(cursor, "Course_Prerequisites", ["Course_id", "Prerequisite_Course_id"], (
+            (i, p) for i in range(2, n["courses"] + 1)
+            for p in rng.sample(range(1, i), min(i - 1, rng.choice((0, 0, 1, 1, 2, 3))))
+        ))
+        _copy(cursor, "Teaches", ["Instructor_id", "Course_id"], (
+            (t, i) for i in range(1, n["courses"] + 1)
+            for t in rng.sample(range(1, n["instructors"] + 1), rng.randint(1, 2))
+        ))
+
+        def enrollment_rows():
+            remaining = enrollments
+            students = n["students"]
+            for s in range(1, students + 1):
+                # Spread what is left evenly over the remaining students
+                share = remaining // (students - s + 1)
+                take = min(n["courses"], share + (1 if rng.random() < 0.5 and share < remaining else 0))
+                remaining -= take
+                for c in rng.sample(range(1, n["courses"] + 1), take):
+                    if rng.random() < 0.6:
+                        yield (s, c, round(rng.uniform(35, 100), 2), "Completed")
+                    else:
+                        yield (s, c, None, "Pending")
+
+        _copy(cursor, "Enrolled_in", ["Student_id", "Course_id", "Evaluation_score", "Status"], enrollment_rows())
+
+        for table, column in (("University", "Uni_id"), ("Topic", "Topic_id"), ("Book", "Book_id"),
+                              ("Course", "Course_id"), ("Student", "Student_id"),
+                              ("Instructor", "Instructor_id")):
+            _sync_sequence(cursor, table, column)
+
+        conn.commit()
+        cursor.execute("ANALYZE")
+
+    print(f"Generated {enrollments} enrollments in {time.monotonic() - started:.1f}s")
+    return n
+
+def write_manifest(path, n, seed):
+    manifest = {
+        "counts": n,
+        "seed": seed,
+        "password": PASSWORD,
+        "email_domain": EMAIL_DOMAIN,
+    }
+    Path(path).write_text(json.dumps(manifest, indent=2))
+    print(f"Wrote manifest to {path}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dsn", default=os.getenv("DATABASE_URL"), help="defaults to DATABASE_URL")
+    parser.add_argument("--scale", default="10k", help=f"one of {', '.join(SCALES)} or an enrollment count")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--manifest", default=str(Path(__file__).with_name("manifest.json")))
+    args = parser.parse_args()
+    if not args.dsn:
+        parser.error("--dsn or DATABASE_URL is required")
+
+    enrollments = SCALES.get(args.scale.lower()) or int(args.scale)
+    n = generate(args.dsn, enrollments, seed=args.seed)
+    write_manifest(args.manifest, n, args.seed)
+
+if __name__ == "__main__":
+    main()
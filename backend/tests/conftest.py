@@ -0,0 +1,63 @@
+"""
+Shared fixtures.
+
+Tests that need PostgreSQL take the `db` fixture and are skipped unless
+TEST_DATABASE_URL points at a server where the test user may create
+schemas. Each test loads database/schema.sql into a schema of its own
+inside one transaction that is rolled back afterwards.
+"""
+import asyncio
+import os
+import uuid
+from pathlib import Path
+import psycopg
+import pytest
+from app.instrumentation import InstrumentedCursor
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+SCHEMA_FILE = Path(__file__).resolve().parents[2] / "database" / "schema.sql"
+
+# Minimal rows the database tests build on
+SEED = """
+    INSERT INTO University (Uni_id, Name, Country) VALUES (1, 'Test University', 'India');
+    INSERT INTO Book (Book_id, Name) VALUES (1, 'Test Book');
+    INSERT INTO Course (Course_id, Name, Price, Duration, Book_id, Uni_id) VALUES
+        (1, 'Intro', 100, 3, 1, 1),
+        (2, 'Advanced', 200, 6, 1, 1);
+    INSERT INTO Course_Prerequisites (Course_id, Prerequisite_Course_id) VALUES (2, 1);
+    INSERT INTO Users (Email_id, Category, Password) VALUES
+        ('ada@example.com', 'Student', 'x'),
+        ('alan@example.com', 'Student', 'x');
+    INSERT INTO Student (Student_id, Name, Email, DOB, Country) VALUES
+        (1, 'Ada', 'ada@example.com', '2000-01-01', 'India'),
+        (2, 'Alan', 'alan@example.com', '2000-01-01', 'India');
+"""
+
+@pytest.fixture
+def db():
+    """Run an async test body against a freshly loaded, throwaway schema.
+
+    Returns run(body), where body is an async function taking a cursor.
+    """
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+
+    def run(body):
+        async def main():
+            conn = await psycopg.AsyncConnection.connect(
+                TEST_DATABASE_URL, cursor_factory=InstrumentedCursor
+            )
+            async with conn:
+                try:
+                    async with conn.cursor() as cursor:
+                        schema = f"test_{uuid.uuid4().hex}"
+                        await cursor.execute(f"CREATE SCHEMA {schema}")
+                        # public stays on the path for the pg_trgm operator classes
+                        await cursor.execute(f"SET LOCAL search_path = {schema}, public")
+                        await cursor.execute(SCHEMA_FILE.read_text())
+                        await cursor.execute(SEED)
+                        return await body(cursor)
+                finally:
+                    await conn.rollback()
+        return asyncio.run(main())
+    return run
@@ -0,0 +1,79 @@
+import asyncio
+import pytest
+from app import authz, catalog
+from app.authz import instructor_access, invalidate, invalidate_all
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+class _Database:
+    """Teaches rows by email; counts lookups and can act mid-lookup"""
+
+    def __init__(self):
+        self.rows = {"grace@example.com": (1, [10, 11])}
+        self.lookups = 0
+        self.during_lookup = None
+
+    async def execute_prepared(self, cursor, name, params=None):
+        assert name == "instructor_courses"
+        self.lookups += 1
+        if self.during_lookup:
+            self.during_lookup()
+        cursor.row = self.rows.get(params[0])
+
+class _Cursor:
+    async def fetchone(self):
+        return self.row
+
+@pytest.fixture
+def database(monkeypatch):
+    database = _Database()
+    clock = _Clock()
+    monkeypatch.setattr(authz, "execute_prepared", database.execute_prepared)
+    monkeypatch.setattr(authz.time, "monotonic", clock)
+    database.clock = clock
+    authz._cache.clear()
+    yield database
+    authz._cache.clear()
+
+def _access(email="grace@example.com"):
+    return asyncio.run(instructor_access(_Cursor(), email))
+
+def test_repeat_lookups_are_served_from_the_cache(database):
+    assert _access().course_ids == {10, 11}
+    assert _access().course_ids == {10, 11}
+    assert database.lookups == 1
+
+def test_entries_expire_after_the_ttl(database):
+    _access()
+    database.rows["grace@example.com"] = (1, [10])
+    database.clock.now += authz.AUTHZ_CACHE_TTL + 1
+    assert _access().course_ids == {10}
+    assert database.lookups == 2
+
+@pytest.mark.parametrize("drop", [
+    lambda: invalidate(email="grace@example.com"),
+    lambda: invalidate(instructor_id=1),
+    invalidate_all,
+    lambda: catalog._changed([10]),  # catalog notification applied on this worker
+])
+def test_invalidation_forces_a_fresh_lookup(database, drop):
+    _access()
+    database.rows["grace@example.com"] = (1, [10, 11, 12])
+    drop()
+    assert _access().course_ids == {10, 11, 12}
+
+def test_lookup_racing_an_invalidation_is_not_cached(database):
+    database.during_lookup = invalidate_all
+    _access()
+    database.during_lookup = None
+    _access()
+    assert database.lookups == 2
+
+def test_unknown_instructor_is_not_cached(database):
+    assert _access("nobody@example.com") is None
+    assert "nobody@example.com" not in authz._cache
@@ -0,0 +1,75 @@
+from decimal import Decimal
+from app.catalog import Catalog, _course_from_row, _courses_from_rows
+from app.models import CourseSearch
+from app.search import search_catalog, contains_pattern, encode_cursor
+
+def _row(course_id, name, course_type="Degree", difficulty_level="Beginner", prerequisites=()):
+    return (
+        course_id, name, Decimal("100.00"), 6, course_type, difficulty_level,
+        None, None, 1, 1, [], [], list(prerequisites),
+    )
+
+def _catalog(rows):
+    catalog = Catalog()
+    for course in _courses_from_rows(rows):
+        catalog.courses[course.course_id] = course
+    # Stand-in for ORDER_QUERY; the real order comes from the database collation
+    catalog._set_order(
+        (course_id, n) for n, course_id in
+        enumerate(sorted(catalog.courses, key=lambda i: (catalog.courses[i].name, i)))
+    )
+    catalog.names["universities"][1] = "Uni"
+    catalog.names["books"][1] = "Book"
+    return catalog
+
+def test_course_with_null_type_and_difficulty_loads():
+    course = _course_from_row(_row(1, "Algebra", course_type=None, difficulty_level=None))
+    assert course.course_type is None
+    assert course.difficulty_level is None
+
+def test_bad_row_is_skipped_not_fatal():
+    courses = _courses_from_rows([_row(1, "Algebra"), _row(2, None), _row(3, "Calculus")])
+    assert [c.course_id for c in courses] == [1, 3]
+
+def test_search_serves_course_with_null_columns():
+    catalog = _catalog([_row(1, "Algebra", course_type=None, difficulty_level=None), _row(2, "Biology")])
+    courses, _, facets = search_catalog(catalog, CourseSearch(include_facets=True), 0)
+    assert [c.course_name for c in courses] == ["Algebra", "Biology"]
+    assert courses[0].course_type is None
+    assert [f.value for f in facets.course_type] == ["Degree", None]
+
+def test_order_follows_database_not_codepoints():
+    catalog = _catalog([_row(1, "apple"), _row(2, "Banana"), _row(3, "Éclair")])
+    # As a case- and accent-insensitive collation would order them
+    catalog._set_order([(2, 1), (1, 0), (3, 2)])
+    courses, _, _ = search_catalog(catalog, CourseSearch(), 0)
+    assert [c.course_name for c in courses] == ["apple", "Banana", "Éclair"]
+
+def test_cursor_resumes_after_its_course():
+    catalog = _catalog([_row(1, "Algebra"), _row(2, "Biology"), _row(3, "Calculus")])
+    assert catalog.start_index(["Biology", 2]) == 2
+    courses, _, _ = search_catalog(catalog, CourseSearch(cursor=encode_cursor("Biology", 2)), 2)
+    assert [c.course_name for c in courses] == ["Calculus"]
+
+def test_cursor_for_renamed_or_deleted_course_is_unplaced():
+    catalog = _catalog([_row(1, "Algebra"), _row(2, "Biology")])
+    assert catalog.start_index(["Old name", 2]) is None
+    assert catalog.start_index(["Zoology", 9]) is None
+
+def test_like_wildcards_match_literally():
+    assert contains_pattern("100%_off\\") == "%100\\%\\_off\\\\%"
+    catalog = _catalog([_row(1, "C_programming"), _row(2, "Cxprogramming")])
+    courses, _, _ = search_catalog(catalog, CourseSearch(name="c_p"), 0)
+    assert [c.course_name for c in courses] == ["C_programming"]
+
+def test_eligible_uses_direct_prerequisites_like_enroll():
+    # 3 requires 2, which requires 1; 4 requires both 1 and 3
+    catalog = _catalog([
+        _row(1, "Intro"), _row(2, "Middle", prerequisites=[1]),
+        _row(3, "Advanced", prerequisites=[2]), _row(4, "Capstone", prerequisites=[1, 3]),
+    ])
+    index = catalog.prerequisites
+    assert index.eligible(set()) == {1}
+    # Only 3's direct prerequisite is completed, as the enroll statement checks
+    assert index.eligible({2}, excluded={2}) == {1, 3}
+    assert index.eligible({1, 3}, excluded={1, 3}) == {2, 4}
@@ -0,0 +1,139 @@
+import asyncio
+from contextlib import asynccontextmanager
+import psycopg
+from psycopg_pool import PoolClosed
+import pytest
+from fastapi import HTTPException
+from app import database
+from app.database import RequestTransaction, after_commit, execute_query
+
+class _FailingCommit:
+    """Cursor context whose exit (the COMMIT) raises error"""
+
+    def __init__(self, error):
+        self.error = error
+
+    async def __aexit__(self, *exc_info):
+        raise self.error
+
+def _end_with_commit_error(error):
+    transaction = RequestTransaction()
+    transaction._context = _FailingCommit(error)
+    with pytest.raises(HTTPException) as caught:
+        asyncio.run(transaction.end())
+    return caught.value
+
+def test_deferred_constraint_failure_at_commit_is_409():
+    error = _end_with_commit_error(psycopg.errors.ForeignKeyViolation("violates foreign key"))
+    assert error.status_code == 409
+
+def test_serialization_failure_at_commit_is_retryable_503():
+    error = _end_with_commit_error(psycopg.errors.SerializationFailure("could not serialize"))
+    assert error.status_code == 503
+    assert "Retry-After" in error.headers
+
+class _Commit:
+    """Cursor context whose exit commits, recording when it happened"""
+
+    def __init__(self, log):
+        self.log = log
+
+    async def __aexit__(self, *exc_info):
+        self.log.append("commit" if exc_info[0] is None else "rollback")
+
+def _run_in_transaction(log, error=None):
+    async def run():
+        transaction = RequestTransaction()
+        transaction._context = _Commit(log)
+        token = database._request_transaction.set(transaction)
+        try:
+            after_commit(lambda: log.append("invalidate"))
+            log.append("endpoint done")
+            await transaction.end(error)
+        finally:
+            database._request_transaction.reset(token)
+    asyncio.run(run())
+
+def test_after_commit_callbacks_wait_for_the_commit():
+    log = []
+    _run_in_transaction(log)
+    assert log == ["endpoint done", "commit", "invalidate"]
+
+def test_after_commit_callbacks_are_dropped_on_rollback():
+    log = []
+    _run_in_transaction(log, error=RuntimeError("boom"))
+    assert log == ["endpoint done", "rollback"]
+
+def test_after_commit_outside_a_request_runs_immediately():
+    log = []
+    after_commit(lambda: log.append("invalidate"))
+    assert log == ["invalidate"]
+
+def _query_with_failure(monkeypatch, error, broken):
+    attempts = []
+
+    class Cursor:
+        connection = type("Connection", (), {"broken": broken})()
+
+        async def execute(self, query, params=None):
+            attempts.append(query)
+            if len(attempts) == 1:
+                raise error
+
+        async def fetchall(self):
+            return [(1,)]
+
+    @asynccontextmanager
+    async def get_db_cursor(commit=True, readonly=False, autocommit=False):
+        yield Cursor()
+
+    monkeypatch.setattr(database, "get_db_cursor", get_db_cursor)
+    try:
+        return asyncio.run(execute_query("SELECT 1", fetch=True)), attempts
+    except psycopg.OperationalError:
+        return None, attempts
+
+def test_read_is_retried_when_the_connection_dropped(monkeypatch):
+    rows, attempts = _query_with_failure(monkeypatch, psycopg.OperationalError("server closed"), True)
+    assert rows == [(1,)] and len(attempts) == 2
+
+def test_statement_timeout_is_not_retried(monkeypatch):
+    rows, attempts = _query_with_failure(monkeypatch, psycopg.errors.QueryCanceled("timeout"), False)
+    assert rows is None and len(attempts) == 1
+
+class _Pool:
+    """Pool stand-in; a closed one hands over to its replacement first"""
+
+    def __init__(self, replacement=None):
+        self.replacement = replacement
+        self.returned = []
+
+    async def getconn(self):
+        if self.replacement is not None:
+            database.connection_pool = self.replacement
+            raise PoolClosed("the pool is closed")
+        return type("Connection", (), {"autocommit": True, "broken": False})()
+
+    async def putconn(self, conn):
+        self.returned.append(conn)
+
+def _checkout(monkeypatch, pool):
+    monkeypatch.setattr(database, "connection_pool", pool)
+    monkeypatch.setattr(database, "replica_pool", None)
+
+    async def run():
+        async with database.get_db_connection(autocommit=True) as conn:
+            return conn
+    return asyncio.run(run())
+
+def test_checkout_moves_to_the_recycled_pool(monkeypatch):
+    new_pool = _Pool()
+    conn = _checkout(monkeypatch, _Pool(replacement=new_pool))
+    assert new_pool.returned == [conn]
+
+def test_closed_pool_without_replacement_is_503(monkeypatch):
+    closed = _Pool()
+    closed.replacement = closed
+    with pytest.raises(HTTPException) as caught:
+        _checkout(monkeypatch, closed)
+    assert caught.value.status_code == 503
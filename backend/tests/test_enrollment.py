@@ -0,0 +1,69 @@
+import asyncio
+from app.enrollment import csv_rows, json_rows, stage_rows, enroll_staged
+from app.models import BulkEnrollmentError
+
+class _Upload:
+    """Request stand-in for a CSV or JSON body"""
+
+    def __init__(self, body=b"", payload=None):
+        self.body = body
+        self.payload = payload
+
+    async def stream(self):
+        yield self.body
+
+    async def json(self):
+        return self.payload
+
+def _collect(rows):
+    async def collect():
+        return [row async for row in rows]
+    return asyncio.run(collect())
+
+def test_csv_rows_report_invalid_rows_by_position():
+    body = b"email,course_id\nada@example.com,1\nbad-row\nalan@example.com,abc\n"
+    rows = _collect(csv_rows(_Upload(body)))
+    assert rows[0] == (1, "ada@example.com", 1)
+    assert [(r.row, r.error.split(":")[0]) for r in rows[1:]] == [(2, "Invalid row"), (3, "Invalid row")]
+    assert rows[2].email == "alan@example.com" and rows[2].course_id is None
+
+def test_json_rows_reject_non_objects():
+    rows = _collect(json_rows(_Upload(payload=[{"email": " ada@example.com ", "course_id": 2}, "x"])))
+    assert rows[0] == (1, "ada@example.com", 2)
+    assert isinstance(rows[1], BulkEnrollmentError) and rows[1].row == 2
+
+def test_invalid_and_duplicate_staged_rows_are_reported(db):
+    body = b"\n".join([
+        b"ada@example.com,1",      # enrolled
+        b"ada@example.com,1",      # duplicate of row 1
+        b"nobody@example.com,1",   # unknown student
+        b"alan@example.com,99",    # unknown course
+        b"alan@example.com,2",     # prerequisite Intro not completed
+        b"alan@example.com",       # malformed, never staged
+        b"alan@example.com,1",     # enrolled
+    ])
+
+    async def scenario(cursor):
+        received, parse_errors = await stage_rows(cursor, csv_rows(_Upload(body)))
+        errors = await enroll_staged(cursor)
+        await cursor.execute("SELECT Student_id, Course_id FROM Enrolled_in ORDER BY 1, 2")
+        return received, parse_errors, errors, await cursor.fetchall()
+
+    received, parse_errors, errors, enrolled = db(scenario)
+    assert received == 7
+    assert [e.row for e in parse_errors] == [6]
+    assert [(e.row, e.error) for e in errors] == [
+        (2, "Duplicate row in upload"),
+        (3, "Student not found"),
+        (4, "Course not found"),
+        (5, "Prerequisites not completed: Intro"),
+    ]
+    assert enrolled == [(1, 1), (2, 1)]
+
+def test_already_enrolled_rows_are_not_inserted_twice(db):
+    async def scenario(cursor):
+        await cursor.execute("INSERT INTO Enrolled_in VALUES (1, 1, NULL, 'Pending')")
+        await stage_rows(cursor, csv_rows(_Upload(b"ada@example.com,1\n")))
+        return await enroll_staged(cursor)
+
+    assert [(e.row, e.error) for e in db(scenario)] == [(1, "Already enrolled in this course")]
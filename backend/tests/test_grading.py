@@ -0,0 +1,63 @@
+import asyncio
+from decimal import Decimal
+from app.grading import apply_grades, import_gradebook
+from app.models import StudentGrade
+
+class _GradeCursor:
+    """Cursor stand-in for APPLY_GRADES: students in enrolled are updated"""
+
+    def __init__(self, enrolled):
+        self.enrolled = enrolled
+        self.batches = []
+
+    async def execute(self, query, params=None):
+        student_ids = params[0]
+        self.batches.append(student_ids)
+        self.result = (
+            sum(1 for s in student_ids if s in self.enrolled),
+            [s for s in student_ids if s not in self.enrolled],
+        )
+
+    async def fetchone(self):
+        return self.result
+
+def _grade(student_id, score=80, status="Completed"):
+    return StudentGrade(student_id=student_id, evaluation_score=score, status=status)
+
+def test_not_enrolled_and_duplicate_students_come_back_as_errors():
+    cursor = _GradeCursor(enrolled={1})
+    updated, errors = asyncio.run(apply_grades(cursor, 10, [_grade(1), _grade(2), _grade(1, 50)]))
+    assert updated == 1
+    assert [(e.student_id, e.error) for e in errors] == [
+        (1, "Duplicate student in batch"),
+        (2, "Student is not enrolled in this course"),
+    ]
+    # One statement for the whole batch, first grade wins for the duplicate
+    assert cursor.batches == [[1, 2]]
+
+def test_gradebook_import_maps_errors_to_csv_rows():
+    async def records():
+        for record in (
+            ["student_id", "name", "email", "evaluation_score", "status"],
+            ["1", "Ada", "ada@example.com", "91", "Completed"],
+            ["2", "Alan", "alan@example.com", "", "Pending"],
+            ["3", "Grace", "grace@example.com", "70", "Completed"],
+            ["x", "Bad", "bad@example.com", "70", "Completed"],
+        ):
+            yield record
+
+    result = asyncio.run(import_gradebook(_GradeCursor(enrolled={1}), 10, records()))
+    assert (result.received, result.updated, result.skipped) == (4, 1, 1)
+    assert [(e.row, e.student_id) for e in result.errors] == [(3, 3), (4, None)]
+
+def test_grading_a_student_who_is_not_enrolled(db):
+    async def scenario(cursor):
+        await cursor.execute("INSERT INTO Enrolled_in VALUES (1, 1, NULL, 'Pending')")
+        result = await apply_grades(cursor, 1, [_grade(1, 91), _grade(2, 75)])
+        await cursor.execute("SELECT Student_id, Evaluation_score, Status FROM Enrolled_in")
+        return result, await cursor.fetchall()
+
+    (updated, errors), rows = db(scenario)
+    assert updated == 1
+    assert [(e.student_id, e.error) for e in errors] == [(2, "Student is not enrolled in this course")]
+    assert rows == [(1, Decimal("91.00"), "Completed")]
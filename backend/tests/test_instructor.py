@@ -0,0 +1,37 @@
+import pytest
+from fastapi import HTTPException
+from app.routers.instructor import get_my_courses
+
+INSTRUCTORS = """
+    INSERT INTO Users (Email_id, Category, Password) VALUES
+        ('grace@example.com', 'Instructor', 'x'),
+        ('idle@example.com', 'Instructor', 'x');
+    INSERT INTO Instructor (Instructor_id, Name, Email) VALUES
+        (1, 'Grace', 'grace@example.com'),
+        (2, 'Idle', 'idle@example.com');
+    INSERT INTO Teaches VALUES (1, 1), (1, 2);
+    INSERT INTO Topic (Topic_id, Name) VALUES (1, 'Algebra');
+    INSERT INTO Course_Topic VALUES (2, 1);
+    INSERT INTO Enrolled_in VALUES (1, 1, NULL, 'Pending'), (2, 1, NULL, 'Pending'), (1, 2, NULL, 'Pending');
+"""
+
+def test_my_courses_aggregates_topics_and_counts_in_one_statement(db):
+    async def scenario(cursor):
+        await cursor.execute(INSTRUCTORS)
+        return await get_my_courses("grace@example.com", cursor)
+
+    courses = db(scenario)
+    assert [(c["course_name"], c["topics"], c["student_count"]) for c in courses] == [
+        ("Advanced", ["Algebra"], 1),
+        ("Intro", [], 2),
+    ]
+
+def test_my_courses_for_instructor_without_courses_or_unknown_email(db):
+    async def scenario(cursor):
+        await cursor.execute(INSTRUCTORS)
+        idle = await get_my_courses("idle@example.com", cursor)
+        with pytest.raises(HTTPException) as caught:
+            await get_my_courses("nobody@example.com", cursor)
+        return idle, caught.value.status_code
+
+    assert db(scenario) == ([], 404)
@@ -0,0 +1,28 @@
+from app import instrumentation
+from app.instrumentation import (
+    DB_N_PLUS_ONE_THRESHOLD, fingerprint, start_request, finish_request,
+    record_query, get_offending_requests
+)
+
+def test_fingerprint_ignores_literals():
+    assert fingerprint("SELECT * FROM Course WHERE Course_id = 7") == \
+        fingerprint("SELECT * FROM Course  WHERE Course_id = %s")
+
+def test_repeated_statement_is_reported_per_request():
+    instrumentation._offending_requests.clear()
+    stats, token = start_request({"path": "/student/my-courses/a@b.c"})
+    for _ in range(DB_N_PLUS_ONE_THRESHOLD + 1):
+        record_query("SELECT Name FROM Course WHERE Course_id = %s", 0.5, 1)
+    record_query("SELECT 1", 0.1, 1)
+    summary = finish_request(stats, token)
+
+    assert summary["query_count"] == DB_N_PLUS_ONE_THRESHOLD + 2
+    assert list(summary["repeated_queries"].values()) == [DB_N_PLUS_ONE_THRESHOLD + 1]
+    assert get_offending_requests()[0]["route"] == "/student/my-courses/a@b.c"
+
+def test_request_without_repeats_is_not_kept():
+    instrumentation._offending_requests.clear()
+    stats, token = start_request({"path": "/"})
+    record_query("SELECT 1", 0.1, 1)
+    assert finish_request(stats, token)["repeated_queries"] == {}
+    assert get_offending_requests() == []
@@ -0,0 +1,68 @@
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi.testclient import TestClient
+from app import database, streaming
+from app.database import _pool_busy
+from app.main import app
+
+class _Cursor:
+    def __init__(self, rows):
+        self.rows = rows
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        pass
+
+    async def execute(self, query, params=None, **kwargs):
+        pass
+
+    async def fetchmany(self, size=0):
+        rows, self.rows = self.rows, []
+        return rows
+
+    async def fetchall(self):
+        return await self.fetchmany()
+
+    async def close(self):
+        pass
+
+class _Connection:
+    rows = [(1, "Ada", "ada@example.com", "India", "Beginner", 90, "Completed")]
+
+    def cursor(self, name=None):
+        return _Cursor(list(self.rows))
+
+    @asynccontextmanager
+    async def transaction(self):
+        yield
+
+def _single_connection_pool():
+    """get_db_connection stand-in backed by a pool of one connection"""
+    slot = asyncio.Semaphore(1)
+
+    @asynccontextmanager
+    async def get_db_connection(readonly=False, autocommit=False, commit=True):
+        try:
+            await asyncio.wait_for(slot.acquire(), timeout=0.5)
+        except asyncio.TimeoutError:
+            raise _pool_busy("Timed out waiting for a database connection")
+        try:
+            yield _Connection()
+        finally:
+            slot.release()
+    return get_db_connection
+
+def test_streamed_endpoint_runs_on_a_pool_of_one(monkeypatch):
+    pool = _single_connection_pool()
+    monkeypatch.setattr(database, "get_db_connection", pool)
+    monkeypatch.setattr(streaming, "get_db_connection", pool)
+
+    response = TestClient(app).get(
+        "/analyst/statistics/course/1/students",
+        headers={"Accept": "application/x-ndjson"}
+    )
+    assert response.status_code == 200
+    assert response.text.count("\n") == 1
+    assert '"email": "ada@example.com"' in response.text
@@ -0,0 +1,64 @@
+import asyncio
+import csv
+import io
+import pytest
+from contextlib import asynccontextmanager
+from fastapi import HTTPException
+from app import streaming
+from app.database import _pool_busy
+from app.grading import GRADEBOOK_HEADER
+from app.streaming import csv_records
+
+class _Upload:
+    """Request stand-in whose body arrives in small chunks"""
+
+    def __init__(self, body, chunk_size=7):
+        self.body = body
+        self.chunk_size = chunk_size
+
+    async def stream(self):
+        for i in range(0, len(self.body), self.chunk_size):
+            yield self.body[i:i + self.chunk_size]
+
+def _records(body, chunk_size=7):
+    async def collect():
+        return [r async for r in csv_records(_Upload(body, chunk_size))]
+    return asyncio.run(collect())
+
+def test_gradebook_export_round_trips_through_import():
+    rows = [
+        (1, "Ada\nLovelace", "ada@example.com", 91, "Completed"),
+        (2, 'Grace "Amazing" Hopper', "grace@example.com", None, "Pending"),
+        (3, "Line\r\nbreak, comma", "x@example.com", 70, "Completed"),
+    ]
+
+    async def batches():
+        yield rows[:2]
+        yield rows[2:]
+
+    async def export():
+        return b"".join([chunk async for chunk in streaming._stream_csv(batches(), GRADEBOOK_HEADER)])
+    body = asyncio.run(export())
+
+    expected = [list(GRADEBOOK_HEADER)] + [["" if v is None else str(v) for v in row] for row in rows]
+    for chunk_size in (1, 7, len(body)):
+        assert _records(body, chunk_size) == expected
+
+def test_blank_lines_and_bom_are_ignored():
+    assert _records(b"\xef\xbb\xbfa,b\n\n1,2\n3,4") == [["a", "b"], ["1", "2"], ["3", "4"]]
+
+def test_records_match_csv_reader_with_newline_empty():
+    text = 'id,note\n1,"first\nsecond"\n2,"say ""hi"""\n'
+    assert _records(text.encode(), 3) == list(csv.reader(io.StringIO(text, newline="")))
+
+def test_busy_pool_fails_before_the_response_starts(monkeypatch):
+    @asynccontextmanager
+    async def saturated(readonly=False):
+        raise _pool_busy("Timed out waiting for a database connection")
+        yield
+
+    monkeypatch.setattr(streaming, "get_db_connection", saturated)
+    with pytest.raises(HTTPException) as caught:
+        asyncio.run(streaming.ndjson_query_response("SELECT 1", (), list))
+    assert caught.value.status_code == 503
+    assert "Retry-After" in caught.value.headers
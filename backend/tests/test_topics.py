@@ -0,0 +1,59 @@
+import asyncio
+import pytest
+from app import topics
+from app.topics import resolve_topic_ids
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    topics._topic_ids.clear()
+    yield
+    topics._topic_ids.clear()
+
+class _TopicCursor:
+    """Cursor stand-in for UPSERT_TOPICS over a case-insensitive Topic table"""
+
+    def __init__(self, existing):
+        self.table = {name.lower(): (name, topic_id) for name, topic_id in existing.items()}
+        self.sent = []
+
+    async def execute(self, query, params=None):
+        names = params[0]
+        self.sent.append(names)
+        self.rows = []
+        for name in names:
+            if name.lower() in self.table:
+                self.rows.append((name, self.table[name.lower()][1], False))
+            else:
+                topic_id = len(self.table) + 100
+                self.table[name.lower()] = (name, topic_id)
+                self.rows.append((name, topic_id, True))
+
+    async def fetchall(self):
+        return self.rows
+
+def test_names_differing_only_in_case_resolve_to_one_topic():
+    cursor = _TopicCursor({"Machine Learning": 7})
+    ids = asyncio.run(resolve_topic_ids(cursor, ["machine learning", "Data Science", "MACHINE LEARNING", "data science"]))
+    assert ids[0] == 7 and len(ids) == 2
+    # One upsert, with the first spelling of each name
+    assert cursor.sent == [["machine learning", "Data Science"]]
+
+def test_only_committed_topics_are_cached():
+    cursor = _TopicCursor({"Machine Learning": 7})
+    asyncio.run(resolve_topic_ids(cursor, ["Machine Learning", "Brand New"]))
+    assert topics._topic_ids == {"machine learning": 7}
+
+    asyncio.run(resolve_topic_ids(cursor, ["MACHINE learning"]))
+    assert len(cursor.sent) == 1  # served from the cache
+
+def test_case_collisions_against_the_unique_index(db):
+    async def scenario(cursor):
+        await cursor.execute("INSERT INTO Topic (Name) VALUES ('Machine Learning') RETURNING Topic_id")
+        (existing,) = await cursor.fetchone()
+        ids = await resolve_topic_ids(cursor, ["machine learning", "Data Science", "DATA SCIENCE"])
+        await cursor.execute("SELECT Name FROM Topic ORDER BY Name")
+        return existing, ids, [row[0] for row in await cursor.fetchall()]
+
+    existing, ids, names = db(scenario)
+    assert ids[0] == existing and len(ids) == 2
+    assert names == ["Data Science", "Machine Learning"]
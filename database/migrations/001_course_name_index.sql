@@ -0,0 +1,3 @@
+-- Keyset pagination for /student/search-courses orders by (Name, Course_id)
+-- and seeks past the previous page's last row on this index.
+CREATE INDEX IF NOT EXISTS idx_course_name_id ON Course (Name, Course_id);
@@ -0,0 +1,112 @@
+-- Full-text and trigram search for /student/search-courses.
+--
+-- Course.Search_vector weighs the course name (A), its topic names (B) and
+-- its university name (C). Triggers keep it current whenever a course,
+-- its topics, a topic name or a university name changes, so every write
+-- path (admin, instructor or manual SQL) stays in sync.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+ALTER TABLE Course ADD COLUMN IF NOT EXISTS Search_vector tsvector;
+
+CREATE OR REPLACE FUNCTION course_search_vector(p_course_id INT, p_name TEXT, p_uni_id INT)
+RETURNS tsvector AS $$
+    SELECT setweight(to_tsvector('english', coalesce(p_name, '')), 'A')
+        || setweight(to_tsvector('english', coalesce((
+               SELECT string_agg(t.Name, ' ')
+               FROM Course_Topic ct
+               JOIN Topic t ON ct.Topic_id = t.Topic_id
+               WHERE ct.Course_id = p_course_id
+           ), '')), 'B')
+        || setweight(to_tsvector('english', coalesce((
+               SELECT u.Name FROM University u WHERE u.Uni_id = p_uni_id
+           ), '')), 'C');
+$$ LANGUAGE sql STABLE;
+
+CREATE OR REPLACE FUNCTION refresh_course_search_vectors(p_course_ids INT[])
+RETURNS void AS $$
+    UPDATE Course c
+    SET Search_vector = course_search_vector(c.Course_id, c.Name, c.Uni_id)
+    WHERE c.Course_id = ANY(p_course_ids);
+$$ LANGUAGE sql;
+
+-- Course inserted, renamed or moved to another university
+CREATE OR REPLACE FUNCTION course_search_vector_trigger() RETURNS trigger AS $$
+BEGIN
+    NEW.Search_vector := course_search_vector(NEW.Course_id, NEW.Name, NEW.Uni_id);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS course_search_vector_trg ON Course;
+CREATE TRIGGER course_search_vector_trg
+    BEFORE INSERT OR UPDATE OF Name, Uni_id ON Course
+    FOR EACH ROW EXECUTE FUNCTION course_search_vector_trigger();
+
+-- Topics linked to or unlinked from courses (once per statement)
+CREATE OR REPLACE FUNCTION course_topic_search_vector_trigger() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM refresh_course_search_vectors(ARRAY(SELECT DISTINCT Course_id FROM changed_rows));
+    ELSE
+        PERFORM refresh_course_search_vectors(ARRAY(SELECT DISTINCT Course_id FROM removed_rows));
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS course_topic_insert_search_trg ON Course_Topic;
+CREATE TRIGGER course_topic_insert_search_trg
+    AFTER INSERT ON Course_Topic
+    REFERENCING NEW TABLE AS changed_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION course_topic_search_vector_trigger();
+
+DROP TRIGGER IF EXISTS course_topic_delete_search_trg ON Course_Topic;
+CREATE TRIGGER course_topic_delete_search_trg
+    AFTER DELETE ON Course_Topic
+    REFERENCING OLD TABLE AS removed_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION course_topic_search_vector_trigger();
+
+-- Topic renamed
+CREATE OR REPLACE FUNCTION topic_search_vector_trigger() RETURNS trigger AS $$
+BEGIN
+    PERFORM refresh_course_search_vectors(
+        ARRAY(SELECT Course_id FROM Course_Topic WHERE Topic_id = NEW.Topic_id)
+    );
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS topic_search_vector_trg ON Topic;
+CREATE TRIGGER topic_search_vector_trg
+    AFTER UPDATE OF Name ON Topic
+    FOR EACH ROW WHEN (OLD.Name IS DISTINCT FROM NEW.Name)
+    EXECUTE FUNCTION topic_search_vector_trigger();
+
+-- University renamed
+CREATE OR REPLACE FUNCTION university_search_vector_trigger() RETURNS trigger AS $$
+BEGIN
+    PERFORM refresh_course_search_vectors(
+        ARRAY(SELECT Course_id FROM Course WHERE Uni_id = NEW.Uni_id)
+    );
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS university_search_vector_trg ON University;
+CREATE TRIGGER university_search_vector_trg
+    AFTER UPDATE OF Name ON University
+    FOR EACH ROW WHEN (OLD.Name IS DISTINCT FROM NEW.Name)
+    EXECUTE FUNCTION university_search_vector_trigger();
+
+-- Backfill existing courses
+UPDATE Course c
+SET Search_vector = course_search_vector(c.Course_id, c.Name, c.Uni_id)
+WHERE c.Search_vector IS NULL;
+
+CREATE INDEX IF NOT EXISTS idx_course_search_vector ON Course USING GIN (Search_vector);
+
+-- Substring (ILIKE '%x%') filters on names
+CREATE INDEX IF NOT EXISTS idx_course_name_trgm ON Course USING GIN (Name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_university_name_trgm ON University USING GIN (Name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_topic_name_trgm ON Topic USING GIN (Name gin_trgm_ops);
@@ -0,0 +1,4 @@
+-- Enrolled_in's primary key leads with Student_id, so per-course lookups
+-- (enrollment counts, rosters, gradebooks, course statistics) scanned the
+-- whole table. This index serves them and covers COUNT(*) by course.
+CREATE INDEX IF NOT EXISTS idx_enrolled_in_course ON Enrolled_in (Course_id);
@@ -0,0 +1,26 @@
+-- Topics are matched case-insensitively, but nothing stopped two requests
+-- from creating 'Databases' and 'databases' at the same time. Merge such
+-- duplicates into the lowest Topic_id, then enforce uniqueness so topic
+-- upserts can rely on ON CONFLICT (lower(Name)).
+
+-- Point course links at the surviving topic
+WITH duplicates AS (
+    SELECT Topic_id, MIN(Topic_id) OVER (PARTITION BY lower(Name)) AS Keep_id
+    FROM Topic
+)
+INSERT INTO Course_Topic (Course_id, Topic_id)
+SELECT ct.Course_id, d.Keep_id
+FROM Course_Topic ct
+JOIN duplicates d ON ct.Topic_id = d.Topic_id
+WHERE d.Topic_id <> d.Keep_id
+ON CONFLICT DO NOTHING;
+
+-- Remove the duplicates; their Course_Topic rows cascade
+DELETE FROM Topic t
+USING (
+    SELECT Topic_id, MIN(Topic_id) OVER (PARTITION BY lower(Name)) AS Keep_id
+    FROM Topic
+) d
+WHERE t.Topic_id = d.Topic_id AND d.Topic_id <> d.Keep_id;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_topic_name_lower ON Topic (lower(Name));
@@ -23,6 +23,9 @@ export default function StudentDashboard() {
   const [searchDifficulty, setSearchDifficulty] = useState('all');
   const [searchType, setSearchType] = useState('all');
   const [searchResults, setSearchResults] = useState<any[]>([]);
+  const [searchParams, setSearchParams] = useState<any>({});
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [facets, setFacets] = useState<any>(null);
 
   // My courses
   const [myCourses, setMyCourses] = useState<any[]>([]);
@@ -88,8 +91,22 @@ export default function StudentDashboard() {
       if (searchDifficulty && searchDifficulty !== 'all') params.difficulty_level = searchDifficulty;
       if (searchType && searchType !== 'all') params.course_type = searchType;
 
-      const results = await studentAPI.searchCourses(params);
-      setSearchResults(results);
+      const page = await studentAPI.searchCourses({ ...params, include_facets: true });
+      setSearchParams(params);
+      setSearchResults(page.courses);
+      setNextCursor(page.next_cursor);
+      setFacets(page.facets);
+    } catch (err: any) {
+      showMessage('Search failed: ' + err.message, true);
+    }
+  };
+
+  const handleLoadMore = async () => {
+    if (!nextCursor) return;
+    try {
+      const page = await studentAPI.searchCourses({ ...searchParams, cursor: nextCursor });
+      setSearchResults(prev => [...prev, ...page.courses]);
+      setNextCursor(page.next_cursor);
     } catch (err: any) {
       showMessage('Search failed: ' + err.message, true);
     }
@@ -203,6 +220,23 @@ export default function StudentDashboard() {
                   <Button type="submit">Search Courses</Button>
                 </form>
 
+                {facets && (
+                  <div className="flex flex-wrap gap-2 text-sm">
+                    {(['course_type', 'difficulty_level'] as const).flatMap((name) =>
+                      facets[name].map((f: any) => (
+                        <Badge key={`${name}:${String(f.value)}`} variant="outline">
+                          {f.value ?? 'Unspecified'} ({f.count})
+                        </Badge>
+                      ))
+                    )}
+                    {facets.price.filter((b: any) => b.count > 0).map((b: any) => (
+                      <Badge key={b.min_price} variant="secondary">
+                        ${b.min_price}{b.max_price ? `–$${b.max_price}` : '+'} ({b.count})
+                      </Badge>
+                    ))}
+                  </div>
+                )}
+
                 {searchResults.length > 0 && (
                   <div className="grid grid-cols-1 md:grid-cols-2 gap-4">
                     {searchResults.map((course: any) => (
@@ -256,6 +290,11 @@ export default function StudentDashboard() {
                     ))}
                   </div>
                 )}
+                {nextCursor && (
+                  <Button variant="outline" className="w-full" onClick={handleLoadMore}>
+                    Load more
+                  </Button>
+                )}
               </CardContent>
             </Card>
           </TabsContent>
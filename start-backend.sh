@@ -30,6 +30,6 @@ echo ""
 # Start backend
 cd backend
 echo "🚀 Starting Backend Server..."
-echo "   You will be prompted for SSH password"
+echo "   Reads backend/.env (you are prompted for the SSH password only if none is set)"
 echo ""
 python -m app.main